@@ -8,14 +8,34 @@
 # Rex Uriel I. Villaflores
 
 # dijkstra
-from typing import Dict, List, Tuple, Optional, Set
+import copy
+import math
+import multiprocessing
+import os
+import struct
+import threading
+import time
+from array import array
+from bisect import insort
+from collections import OrderedDict, deque
+from typing import Dict, Iterable, List, Sequence, Tuple, Optional, Set, Union
+from spatial import SpatialGrid
+
+try:
+    import numpy as np
+except ImportError:  # numpy is optional, haversine_batch falls back to math
+    np = None
+
+INFINITY = float('infinity')  # weight of a closed edge
 
 # custom minheap implementation for dijkstra optimization
 class MinHeap:
     def __init__(self):
         self.heap = []
+        self.pushes = 0  # total pushes, reported through the searches' stats
     #minheap common functions
     def push(self, item: Tuple[float, str]) -> None:
+        self.pushes += 1
         self.heap.append(item)
         self._bubble_up(len(self.heap) - 1)
     def pop(self) -> Tuple[float, str]:
@@ -28,6 +48,11 @@ class MinHeap:
         self._bubble_down(0)
         return min_item
     
+    def peek(self) -> Tuple[float, str]:
+        if len(self.heap) == 0:
+            raise IndexError("peek from empty heap")
+        return self.heap[0]
+
     def __len__(self) -> int:
         return len(self.heap)
     def _bubble_up(self, index: int) -> None:
@@ -55,6 +80,140 @@ class MinHeap:
             else:
                 break
 
+# indexed d-ary heap over integer node ids with a real decrease-key: each node is in the
+# heap at most once, so dijkstra never pops stale duplicates. entries are (key, node) and
+# compare like MinHeap's, so equal keys pop in the same order
+class IndexedHeap:
+    def __init__(self, n: int, arity: int = 4):
+        self.arity = arity
+        self.heap = []
+        self.pos = [-1] * n  # index of each node in heap, -1 when absent
+        self.pushes = 0      # inserts
+        self.decreases = 0
+    # push a node, or lower its key if it is already queued (a larger key is ignored)
+    def push(self, item: Tuple[float, int]) -> None:
+        i = self.pos[item[1]]
+        if i == -1:
+            self.pushes += 1
+            self.heap.append(item)
+            self._sift_up(len(self.heap) - 1, item)
+        elif item < self.heap[i]:
+            self.decreases += 1
+            self._sift_up(i, item)
+    def pop(self) -> Tuple[float, int]:
+        if len(self.heap) == 0:
+            raise IndexError("pop from empty heap")
+        top = self.heap[0]
+        self.pos[top[1]] = -1
+        last = self.heap.pop()
+        if self.heap:
+            self._sift_down(0, last)
+        return top
+    def peek(self) -> Tuple[float, int]:
+        if len(self.heap) == 0:
+            raise IndexError("peek from empty heap")
+        return self.heap[0]
+    def __len__(self) -> int:
+        return len(self.heap)
+    # move item up from index i, shifting larger parents down into the hole
+    def _sift_up(self, i: int, item: Tuple[float, int]) -> None:
+        heap, pos, arity = self.heap, self.pos, self.arity
+        while i > 0:
+            parent = (i - 1) // arity
+            above = heap[parent]
+            if not item < above:
+                break
+            heap[i] = above
+            pos[above[1]] = i
+            i = parent
+        heap[i] = item
+        pos[item[1]] = i
+    def _sift_down(self, i: int, item: Tuple[float, int]) -> None:
+        heap, pos, arity = self.heap, self.pos, self.arity
+        size = len(heap)
+        while True:
+            first = arity * i + 1
+            if first >= size:
+                break
+            best = first
+            best_item = heap[first]
+            for child in range(first + 1, min(first + arity, size)):
+                if heap[child] < best_item:
+                    best, best_item = child, heap[child]
+            if not best_item < item:
+                break
+            heap[i] = best_item
+            pos[best_item[1]] = i
+            i = best
+        heap[i] = item
+        pos[item[1]] = i
+
+_double = struct.Struct('<d')
+
+# monotone radix heap: keys may never drop below the last popped key, which holds for
+# dijkstra with non-negative weights. a non-negative double's bit pattern sorts like the
+# double, so an entry lives in the bucket of the highest bit where its pattern differs from
+# the last popped one, and each pop only redistributes the lowest non-empty bucket.
+# duplicates are allowed like in MinHeap; bucket 0 (key equal to the last popped) keeps
+# negated node ids sorted so ties pop smallest id first, the same order as MinHeap
+class RadixHeap:
+    def __init__(self):
+        self.buckets = [[] for _ in range(65)]
+        self.last_bits = 0
+        self.last_key = 0.0
+        self.size = 0
+        self.pushes = 0
+    def push(self, item: Tuple[float, int]) -> None:
+        key, node = item
+        if key < self.last_key:
+            raise ValueError("radix heap keys must not decrease below the last popped key")
+        bits = int.from_bytes(_double.pack(key), 'little')
+        self.pushes += 1
+        self.size += 1
+        bucket = (bits ^ self.last_bits).bit_length()
+        if bucket == 0:
+            insort(self.buckets[0], -node)
+        else:
+            self.buckets[bucket].append((bits, key, node))
+    def pop(self) -> Tuple[float, int]:
+        if self.size == 0:
+            raise IndexError("pop from empty heap")
+        buckets = self.buckets
+        if not buckets[0]:
+            i = 1
+            while not buckets[i]:
+                i += 1
+            entries = buckets[i]
+            buckets[i] = []
+            bits, key, _ = min(entries)
+            self.last_bits, self.last_key = bits, key
+            # every entry lands in a lower bucket than i
+            for entry in entries:
+                b = (entry[0] ^ bits).bit_length()
+                if b == 0:
+                    buckets[0].append(-entry[2])
+                else:
+                    buckets[b].append(entry)
+            buckets[0].sort()
+        self.size -= 1
+        return self.last_key, -buckets[0].pop()
+    def __len__(self) -> int:
+        return self.size
+
+# priority queues _dijkstra_ids can run on; 'binary' is the lazy MinHeap
+HEAP_KINDS = ('binary', 'indexed2', 'indexed4', 'radix')
+
+def _make_heap(kind: str, n: int):
+    if kind == 'binary':
+        return MinHeap()
+    if kind == 'indexed2':
+        return IndexedHeap(n, 2)
+    if kind == 'indexed4':
+        return IndexedHeap(n, 4)
+    if kind == 'radix':
+        return RadixHeap()
+    raise ValueError(f"unknown heap {kind!r}, expected one of {HEAP_KINDS}")
+
 # manual math functions
 
 #convert degrees to radians
@@ -121,8 +280,20 @@ def manual_asin(x: float) -> float:
         term *= x_squared * (2.0 * n + 1) / (2.0 * n + 2)
     return result
 
+EARTH_RADIUS = 6371000  # meters
+
+# scalar haversine on the math module, also the per-segment fallback for haversine_batch
+def _haversine(lon1: float, lat1: float, lon2: float, lat2: float) -> float:
+    lon1, lat1, lon2, lat2 = map(math.radians, (lon1, lat1, lon2, lat2))
+    a = math.sin((lat2 - lat1) / 2) ** 2 + math.cos(lat1) * math.cos(lat2) * math.sin((lon2 - lon1) / 2) ** 2
+    return 2 * math.asin(math.sqrt(a)) * EARTH_RADIUS
+
 # distance calc using haversine distance using args coord1 and coord2 to ret distance in meters
 def haversine_distance(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
+    return _haversine(coord1[0], coord1[1], coord2[0], coord2[1])
+
+# same formula using the manual series functions above, kept as the reference implementation
+def manual_haversine_distance(coord1: Tuple[float, float], coord2: Tuple[float, float]) -> float:
     lon1, lat1 = coord1
     lon2, lat2 = coord2
     lon1 = manual_radians(lon1)
@@ -136,28 +307,115 @@ def haversine_distance(coord1: Tuple[float, float], coord2: Tuple[float, float])
     a = manual_sin(dlat/2)**2 + manual_cos(lat1) * manual_cos(lat2) * manual_sin(dlon/2)**2
     c = 2 * manual_asin(manual_sqrt(a))
 
-    r = 6371000
-    return c * r
+    return c * EARTH_RADIUS
+
+# distances in meters for many segments at once; starts[i] -> ends[i] as (lon, lat) pairs
+def haversine_batch(starts: Sequence[Tuple[float, float]],
+                    ends: Sequence[Tuple[float, float]],
+                    use_numpy: bool = True) -> List[float]:
+    if len(starts) != len(ends):
+        raise ValueError("starts and ends must have the same length")
+    if len(starts) == 0:
+        return []
+    if np is None or not use_numpy:
+        return [_haversine(s[0], s[1], e[0], e[1]) for s, e in zip(starts, ends)]
+    start = np.radians(np.asarray(starts, dtype=np.float64))
+    end = np.radians(np.asarray(ends, dtype=np.float64))
+    dlon = end[:, 0] - start[:, 0]
+    dlat = end[:, 1] - start[:, 1]
+    a = np.sin(dlat / 2) ** 2 + np.cos(start[:, 1]) * np.cos(end[:, 1]) * np.sin(dlon / 2) ** 2
+    return (2 * np.arcsin(np.sqrt(a)) * EARTH_RADIUS).tolist()
 
 
+# line coordinates as one flat array('d') of lon, lat pairs: 16 bytes a vertex instead
+# of a list, a tuple and two floats
+def flat_coords(line: Sequence[Sequence[float]]) -> array:
+    coords = array('d')
+    for point in line:
+        coords.append(point[0])
+        coords.append(point[1])
+    return coords
+
+# (lon, lat) rows of a flat coordinate array, as haversine_batch takes them
+def _coord_pairs(coords: array):
+    if np is not None:
+        return np.frombuffer(coords, dtype=np.float64).reshape(-1, 2)
+    return list(zip(coords[0::2], coords[1::2]))
+
+
+# pathway geometries for drawing curvy edges: (line start node, line end node) -> [[lon, lat], ...],
+# in both directions. Each line is kept once as a flat array and the reverse direction
+# is built when it is read, so the whole map's vertices are not held twice.
+class EdgeGeometries:
+    def __init__(self):
+        # (start node, end node) -> flat_coords of the line, drawn from start, or a view of
+        # the same values in a snapshot
+        self.lines = {}
+
+    def add(self, start: str, end: str, coords: array) -> None:
+        """Store a line; a later line between the same two nodes replaces it in both directions."""
+        self.lines.pop((end, start), None)
+        self.lines[(start, end)] = coords
+
+    def get(self, key: Tuple[str, str], default=None):
+        start, end = key
+        coords = self.lines.get((start, end))
+        if coords is not None and start != end:
+            return [[coords[i], coords[i + 1]] for i in range(0, len(coords), 2)]
+        # a closed line reads reversed, like the direction that used to be written last
+        coords = self.lines.get((end, start))
+        if coords is not None:
+            return [[coords[i], coords[i + 1]] for i in range(len(coords) - 2, -1, -2)]
+        return default
+
+    def items(self):
+        for (start, end) in self.lines:
+            yield (start, end), self.get((start, end))
+            if start != end:
+                yield (end, start), self.get((end, start))
+
+    def __len__(self) -> int:
+        return sum(1 if start == end else 2 for start, end in self.lines)
+
 #weighted graph building in geojson using multilinestring pathways where bldgs are positioned on the pathway coorsd
 
-def build_graph_from_geojson(geojson_data: dict) -> Tuple[Dict[str, List[Tuple[str, float]]], Dict[str, Tuple[float, float]]]:
-    # extract all bldgs and their coordds
+# pass an EdgeGeometries as edge_geometries to also get the line coords between each line's
+# start and end node, for drawing curvy pathways; pass a dict as feature_edges to get
+# feature index -> (start node, end node) of each segment drawn by that feature
+def build_graph_from_geojson(geojson_data: dict,
+                             edge_geometries: Optional[EdgeGeometries] = None,
+                             feature_edges: Optional[dict] = None) -> Tuple[Dict[str, List[Tuple[str, float]]], Dict[str, Tuple[float, float]]]:
+    return build_graph_from_features(geojson_data['features'], edge_geometries, feature_edges)
+
+# same as build_graph_from_geojson, but reads the features in a single pass so they can
+# come straight from geojson_stream.iter_features without the whole document in memory
+def build_graph_from_features(features: Iterable[dict],
+                              edge_geometries: Optional[EdgeGeometries] = None,
+                              feature_edges: Optional[dict] = None) -> Tuple[Dict[str, List[Tuple[str, float]]], Dict[str, Tuple[float, float]]]:
+    # extract all bldgs and their coordds, and keep the pathway lines (with the index
+    # of their feature, as flat_coords) for later: vertices can only be snapped once
+    # every building is known
     buildings = {}
-    for feature in geojson_data['features']:
-        if feature['geometry']['type'] == 'Point':
+    lines = []
+    for feature_index, feature in enumerate(features):
+        geom_type = feature['geometry']['type']
+        if geom_type == 'Point':
             name = feature['properties'].get('Name', '')
             if name and name != 'Campus Pathways':
                 coords = feature['geometry']['coordinates']
                 buildings[name] = (coords[0], coords[1])  # (lon, lat)
+        elif geom_type == 'MultiLineString':
+            lines.extend((feature_index, flat_coords(line)) for line in feature['geometry']['coordinates'])
+        elif geom_type == 'LineString':
+            lines.append((feature_index, flat_coords(feature['geometry']['coordinates'])))
+    # index bldgs on a grid so snapping a vertex only checks neighboring cells
+    TOLERANCE = 0.0000001  # Very small tolerance for coordinate matching
+    building_grid = SpatialGrid(2 * TOLERANCE)
+    for building_name, (b_lon, b_lat) in buildings.items():
+        building_grid.insert(building_name, b_lon, b_lat)
     #idenitfy bldg name of the node
     def get_building_at_coord(lon: float, lat: float) -> Optional[str]:
-        TOLERANCE = 0.0000001  # Very small tolerance for coordinate matching
-        for building_name, (b_lon, b_lat) in buildings.items():
-            if abs(lon - b_lon) < TOLERANCE and abs(lat - b_lat) < TOLERANCE:
-                return building_name
-        return None
+        return building_grid.find(lon, lat, TOLERANCE)
     # fetch and create node id if none
     coord_to_node = {}
     node_coords = {}  # NEW: store coordinates for path nodes
@@ -179,68 +437,54 @@ def build_graph_from_geojson(geojson_data: dict) -> Tuple[Dict[str, List[Tuple[s
         node_counter += 1
         return node_id
 
-    # build weighted graph from linestring pathways using adjacnecy list
-    graph = {}
+    # collect every pathway segment first so all distances are computed in one batch
+    segments = []  # (start_node, end_node) in file order
+    starts = array('d')  # flat lon, lat of each segment's ends
+    ends = array('d')
 
-    #process all features to find multilinestring and linestirng
-    for feature in geojson_data['features']:
-        geom_type = feature['geometry']['type']
+    feature_segments = set()  # (feature index, start node, end node) already in feature_edges
+    #process the linestrings of every multilinestring and linestirng, in file order
+    for feature_index, line_coords in lines:
+        for i in range(0, len(line_coords) - 2, 2):
+            start_lon, start_lat = line_coords[i], line_coords[i + 1]
+            end_lon, end_lat = line_coords[i + 2], line_coords[i + 3]
+            start_node = get_node_id(start_lon, start_lat)
+            end_node = get_node_id(end_lon, end_lat)
+            segments.append((start_node, end_node))
+            starts.extend((start_lon, start_lat))
+            ends.extend((end_lon, end_lat))
+            if i == 0:
+                line_start = start_node
+            if feature_edges is not None and (feature_index, start_node, end_node) not in feature_segments:
+                feature_segments.add((feature_index, start_node, end_node))
+                feature_edges.setdefault(feature_index, []).append((start_node, end_node))
+        # endpoints resolve through get_node_id, so they are the same nodes as the edges use
+        if edge_geometries is not None and len(line_coords) >= 4:
+            edge_geometries.add(line_start, end_node, line_coords)
+    del lines  # the geometries share the line arrays; nothing else needs them
 
-        if geom_type == 'MultiLineString':
-            line_list = feature['geometry']['coordinates']
-
-            for line_coords in line_list:
-                for i in range(len(line_coords) - 1):
-                    start_lon, start_lat = line_coords[i][0], line_coords[i][1]
-                    end_lon, end_lat = line_coords[i + 1][0], line_coords[i + 1][1]
-                    start_node = get_node_id(start_lon, start_lat)
-                    end_node = get_node_id(end_lon, end_lat)
-                    # distance calcs
-                    distance = haversine_distance(
-                        (start_lon, start_lat),
-                        (end_lon, end_lat)
-                    )
-                    #init start and end node
-                    if start_node not in graph:
-                        graph[start_node] = []
-                    if end_node not in graph:
-                        graph[end_node] = []
-                    #bidirectional edges
-                    edge_exists = False
-                    for neighbor, dist in graph[start_node]:
-                        if neighbor == end_node and abs(dist - distance) < 0.001:
-                            edge_exists = True
-                            break
-                    if not edge_exists:
-                        graph[start_node].append((end_node, distance))
-                        graph[end_node].append((start_node, distance))
+    # distance calcs
+    distances = haversine_batch(_coord_pairs(starts), _coord_pairs(ends))
+    del starts, ends
 
-        elif geom_type == 'LineString':
-            line_coords = feature['geometry']['coordinates']
-            for i in range(len(line_coords) - 1):
-                start_lon, start_lat = line_coords[i][0], line_coords[i][1]
-                end_lon, end_lat = line_coords[i + 1][0], line_coords[i + 1][1]
-                start_node = get_node_id(start_lon, start_lat)
-                end_node = get_node_id(end_lon, end_lat)
-                distance = haversine_distance(
-                    (start_lon, start_lat),
-                    (end_lon, end_lat)
-                )
-
-                if start_node not in graph:
-                    graph[start_node] = []
-                if end_node not in graph:
-                    graph[end_node] = []
-
-                edge_exists = False
-                for neighbor, dist in graph[start_node]:
-                    if neighbor == end_node and abs(dist - distance) < 0.001:
-                        edge_exists = True
-                        break
-
-                if not edge_exists:
-                    graph[start_node].append((end_node, distance))
-                    graph[end_node].append((start_node, distance))
+    # build weighted graph from linestring pathways using adjacnecy list
+    graph = {}
+    edge_index = {}  # (node, neighbor) -> weights of the edges between them, for duplicate checks
+    for (start_node, end_node), distance in zip(segments, distances):
+        #init start and end node
+        if start_node not in graph:
+            graph[start_node] = []
+        if end_node not in graph:
+            graph[end_node] = []
+        #bidirectional edges, skipping one that already exists with the same length
+        known = edge_index.get((start_node, end_node))
+        if known is not None and any(abs(dist - distance) < 0.001 for dist in known):
+            continue
+        graph[start_node].append((end_node, distance))
+        graph[end_node].append((start_node, distance))
+        edge_index.setdefault((start_node, end_node), []).append(distance)
+        if start_node != end_node:
+            edge_index.setdefault((end_node, start_node), []).append(distance)
 
     # Combine buildings and path nodes for complete coordinate dict
     all_coords = {**buildings, **node_coords}
@@ -248,16 +492,187 @@ def build_graph_from_geojson(geojson_data: dict) -> Tuple[Dict[str, List[Tuple[s
     # Return graph, all coordinates, and building names set for distinction
     return graph, all_coords, set(buildings.keys())
 
+# compact array form of the adjacency list (CSR): node ids are ints, and the edges of
+# node i are neighbors[offsets[i]:offsets[i + 1]] with matching weights
+class CompiledGraph:
+    def __init__(self, names: List[str], offsets, neighbors, weights, lons=None, lats=None):
+        self.names = names  # id -> node name
+        self.ids = {name: i for i, name in enumerate(names)}  # node name -> id
+        self.offsets = offsets
+        self.neighbors = neighbors
+        self.weights = weights
+        # optional per-id coordinates, needed by astar
+        self.lons = lons
+        self.lats = lats
+        self._edge_index = None
+
+    @classmethod
+    def from_adjacency(cls, graph: Dict[str, List[Tuple[str, float]]],
+                       coords: Optional[Dict[str, Tuple[float, float]]] = None) -> 'CompiledGraph':
+        """Compile a dict-of-lists graph, keeping each node's neighbor order."""
+        names = list(graph.keys())
+        ids = {name: i for i, name in enumerate(names)}
+        offsets = array('q', [0])
+        neighbors = array('i')
+        weights = array('d')
+        for name in names:
+            for neighbor, weight in graph[name]:
+                neighbors.append(ids[neighbor])
+                weights.append(weight)
+            offsets.append(len(neighbors))
+        lons = lats = None
+        if coords is not None:
+            lons = array('d', (coords[name][0] for name in names))
+            lats = array('d', (coords[name][1] for name in names))
+        return cls(names, offsets, neighbors, weights, lons, lats)
+
+    def to_adjacency(self) -> Dict[str, List[Tuple[str, float]]]:
+        return {name: self.edges_of(name) for name in self.names}
+
+    def edges_of(self, name: str) -> List[Tuple[str, float]]:
+        """Neighbor list of a node in the same shape as the dict graph."""
+        i = self.ids[name]
+        return [(self.names[self.neighbors[k]], self.weights[k])
+                for k in range(self.offsets[i], self.offsets[i + 1])]
+
+    def edge_index(self) -> Dict[int, int]:
+        """(u_id * len(graph) + v_id) -> position of the first u -> v edge, built on first use."""
+        if self._edge_index is None:
+            n = len(self.names)
+            offsets, neighbors = self.offsets, self.neighbors
+            index = {}
+            for u in range(n):
+                for k in range(offsets[u], offsets[u + 1]):
+                    index.setdefault(u * n + neighbors[k], k)
+            self._edge_index = index
+        return self._edge_index
+
+    def pair_slots(self, u: int, v: int) -> List[int]:
+        """Positions of every u -> v and v -> u edge, parallel edges included."""
+        slots = [k for k in range(self.offsets[u], self.offsets[u + 1]) if self.neighbors[k] == v]
+        if u != v:
+            slots += [k for k in range(self.offsets[v], self.offsets[v + 1]) if self.neighbors[k] == u]
+        return slots
+
+    def with_weights(self, weights) -> 'CompiledGraph':
+        """The same nodes and edges with another weights array; everything else is shared."""
+        graph = copy.copy(self)
+        graph.weights = weights
+        return graph
+
+    def edge_weight(self, u: str, v: str) -> Optional[float]:
+        """Weight of the first u -> v edge, or None if they are not adjacent."""
+        if u not in self.ids or v not in self.ids:
+            return None
+        k = self.edge_index().get(self.ids[u] * len(self.names) + self.ids[v])
+        return None if k is None else self.weights[k]
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def __contains__(self, name: str) -> bool:
+        return name in self.ids
+
+    def __iter__(self):
+        return iter(self.names)
+
+Graph = Union[Dict[str, List[Tuple[str, float]]], CompiledGraph]
+
+def _as_compiled(graph: Graph, coords: Optional[Dict[str, Tuple[float, float]]] = None) -> CompiledGraph:
+    if isinstance(graph, CompiledGraph):
+        if coords is not None and graph.lons is None:
+            graph.lons = array('d', (coords[name][0] for name in graph.names))
+            graph.lats = array('d', (coords[name][1] for name in graph.names))
+        return graph
+    return CompiledGraph.from_adjacency(graph, coords)
+
+# walk the predecessor list back from dst and return node names from source to dst
+def _path_names(graph: CompiledGraph, previous: List[int], dst: int) -> List[str]:
+    path = []
+    current = dst
+    while current != -1:
+        path.append(graph.names[current])
+        current = previous[current]
+    path.reverse()
+    return path
+
+# dijkstra over integer node ids; returns the distance and predecessor lists.
+# stops early once destination, or every node in targets, is settled.
+# heap picks the priority queue (HEAP_KINDS); all of them settle nodes in the same order
+def _dijkstra_ids(graph: CompiledGraph, source: int, destination: int = -1,
+                  stats: Optional[dict] = None,
+                  targets: Optional[Set[int]] = None,
+                  heap: str = 'binary') -> Tuple[List[float], List[int]]:
+    n = len(graph.names)
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    distances = [float('infinity')] * n
+    distances[source] = 0.0
+    previous = [-1] * n
+    visited = bytearray(n)
+    pq = _make_heap(heap, n)
+    pq.push((0.0, source))
+    settled = 0
+    remaining = set(targets) if targets else None
+
+    while len(pq) > 0:
+        current_dist, current = pq.pop()
+        if visited[current]:
+            continue
+        visited[current] = 1
+        settled += 1
+        if current == destination:
+            break
+        if remaining is not None and current in remaining:
+            remaining.discard(current)
+            if not remaining:
+                break
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = neighbors[k]
+            if visited[neighbor]:
+                continue
+            distance = current_dist + weights[k]
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                previous[neighbor] = current
+                pq.push((distance, neighbor))
+    if stats is not None:
+        stats['settled'] = settled
+        stats['pushes'] = pq.pushes
+        stats['pops'] = pq.pushes - len(pq)
+        stats['decreases'] = getattr(pq, 'decreases', 0)
+    return distances, previous
+
 # dijkstra's algorithm with min-heap optimization using graph adjacency list, source or starting node, and destination as args
-def dijkstra(graph: Dict[str, List[Tuple[str, float]]],
+# stats, when given, is filled with the number of settled nodes and heap pushes.
+# heap is one of HEAP_KINDS; anything but 'binary' runs on the compiled graph
+def dijkstra(graph: Graph,
              source: str,
-             destination: str) -> Tuple[Optional[List[str]], Optional[float]]:
+             destination: str,
+             stats: Optional[dict] = None,
+             heap: str = 'binary') -> Tuple[Optional[List[str]], Optional[float]]:
+    if heap != 'binary':
+        graph = _as_compiled(graph)
+    if isinstance(graph, CompiledGraph):
+        if source not in graph or destination not in graph:
+            return None, None
+        if source == destination:
+            if stats is not None:
+                stats['settled'] = 0
+            return [source], 0.0
+        src, dst = graph.ids[source], graph.ids[destination]
+        distances, previous = _dijkstra_ids(graph, src, dst, stats, heap=heap)
+        if distances[dst] == float('infinity'):
+            return None, None
+        return _path_names(graph, previous, dst), distances[dst]
+
     # input validation
     if source not in graph:
         return None, None
     if destination not in graph:
         return None, None
     if source == destination:
+        if stats is not None:
+            stats['settled'] = 0
         return [source], 0.0
     # init distances to infinity for all nodes
     distances = {node: float('infinity') for node in graph}
@@ -274,6 +689,8 @@ def dijkstra(graph: Dict[str, List[Tuple[str, float]]],
         if current in visited:
             continue
         visited.add(current)
+        if stats is not None:
+            stats['settled'] = len(visited)
         #stop when we reach destination
         if current == destination:
             break
@@ -291,6 +708,8 @@ def dijkstra(graph: Dict[str, List[Tuple[str, float]]],
                 distances[neighbor] = distance
                 previous[neighbor] = current
                 pq.push((distance, neighbor))
+    if stats is not None:
+        stats['pushes'] = pq.pushes
     # check if destination is reachable
     if distances[destination] == float('infinity'):
         return None, None
@@ -305,51 +724,572 @@ def dijkstra(graph: Dict[str, List[Tuple[str, float]]],
 
     return path, distances[destination]
 
+# routes from one source to many destinations with a single dijkstra run that stops once
+# every destination is settled; returns destination -> (path, distance), (None, None) if unreachable
+def shortest_paths_from(graph: Graph,
+                        source: str,
+                        destinations,
+                        stats: Optional[dict] = None) -> Dict[str, Tuple[Optional[List[str]], Optional[float]]]:
+    results = {destination: (None, None) for destination in destinations}
+    if source not in graph:
+        return results
+    graph = _as_compiled(graph)
+    src = graph.ids[source]
+    targets = {graph.ids[d] for d in results if d in graph and d != source}
+    if targets:
+        distances, previous = _dijkstra_ids(graph, src, stats=stats, targets=targets)
+    elif stats is not None:
+        stats['settled'] = 0
+    for destination in results:
+        if destination == source:
+            results[destination] = ([source], 0.0)
+        elif destination in graph:
+            dst = graph.ids[destination]
+            if distances[dst] != float('infinity'):
+                results[destination] = (_path_names(graph, previous, dst), distances[dst])
+    return results
+
+# distances from source to every reachable node, from one full dijkstra run
+def single_source_distances(graph: Graph, source: str, stats: Optional[dict] = None) -> Dict[str, float]:
+    if source not in graph:
+        return {}
+    graph = _as_compiled(graph)
+    distances, _ = _dijkstra_ids(graph, graph.ids[source], stats=stats)
+    return {graph.names[i]: d for i, d in enumerate(distances) if d != float('infinity')}
+
+# distances from source to every node within budget meters. distances and settled marks
+# live in dicts, so the work and memory grow with the reached area, not the whole graph
+def distances_within(graph: Graph, source: str, budget: float,
+                     stats: Optional[dict] = None) -> Dict[str, float]:
+    if source not in graph or budget < 0:
+        if stats is not None:
+            stats['settled'] = 0
+        return {}
+    graph = _as_compiled(graph)
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    src = graph.ids[source]
+    distances = {src: 0.0}
+    settled = {}
+    pq = MinHeap()
+    pq.push((0.0, src))
+    while len(pq) > 0:
+        current_dist, current = pq.pop()
+        if current in settled:
+            continue
+        settled[current] = current_dist
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = neighbors[k]
+            if neighbor in settled:
+                continue
+            distance = current_dist + weights[k]
+            # beyond the budget is never pushed, so the heap only holds reachable nodes
+            if distance <= budget and distance < distances.get(neighbor, INFINITY):
+                distances[neighbor] = distance
+                pq.push((distance, neighbor))
+    if stats is not None:
+        stats['settled'] = len(settled)
+        stats['pushes'] = pq.pushes
+    return {graph.names[i]: d for i, d in settled.items()}
+
+# distances from source to the given targets only; the search stops as soon as every
+# target is settled. unreachable or unknown targets map to None
+def multi_target_distances(graph: Graph, source: str, targets,
+                           stats: Optional[dict] = None) -> Dict[str, Optional[float]]:
+    results = {target: None for target in targets}
+    if source not in graph:
+        return results
+    graph = _as_compiled(graph)
+    target_ids = {graph.ids[t] for t in results if t in graph and t != source}
+    if target_ids:
+        distances, _ = _dijkstra_ids(graph, graph.ids[source], stats=stats, targets=target_ids)
+    elif stats is not None:
+        stats['settled'] = 0
+    for target in results:
+        if target == source:
+            results[target] = 0.0
+        elif target in graph and distances[graph.ids[target]] != float('infinity'):
+            results[target] = distances[graph.ids[target]]
+    return results
+
+# a* search: dijkstra ordered by distance so far + straight-line distance to the destination.
+# GeoJSON edge weights are haversine lengths of the same coordinates, so the heuristic never
+# overestimates; the small scale-down only absorbs float rounding. an edge reweighted below
+# its straight-line length breaks that, see astar_admissible
+HEURISTIC_SCALE = 0.999999
+
+# whether every edge leaving the given node ids (all nodes by default) is at least as long as
+# the straight line between its ends; if not, astar can return a longer route than dijkstra
+def astar_admissible(graph: CompiledGraph, nodes: Optional[Iterable[int]] = None) -> bool:
+    if graph.lons is None:
+        return False
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    lons, lats = graph.lons, graph.lats
+    for u in (range(len(graph)) if nodes is None else nodes):
+        for k in range(offsets[u], offsets[u + 1]):
+            v = neighbors[k]
+            if weights[k] < _haversine(lons[u], lats[u], lons[v], lats[v]) * HEURISTIC_SCALE:
+                return False
+    return True
+
+def astar(graph: Graph,
+          source: str,
+          destination: str,
+          coords: Optional[Dict[str, Tuple[float, float]]] = None,
+          stats: Optional[dict] = None) -> Tuple[Optional[List[str]], Optional[float]]:
+    if source not in graph or destination not in graph:
+        return None, None
+    if source == destination:
+        if stats is not None:
+            stats['settled'] = 0
+        return [source], 0.0
+    graph = _as_compiled(graph, coords)
+    if graph.lons is None:
+        raise ValueError("astar needs node coordinates")
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    lons, lats = graph.lons, graph.lats
+    src, dst = graph.ids[source], graph.ids[destination]
+    dst_lon, dst_lat = lons[dst], lats[dst]
+
+    n = len(graph.names)
+    distances = [float('infinity')] * n
+    distances[src] = 0.0
+    previous = [-1] * n
+    estimates = {}  # lazily computed lower bounds to the destination
+
+    def estimate(node: int) -> float:
+        if node not in estimates:
+            estimates[node] = _haversine(lons[node], lats[node], dst_lon, dst_lat) * HEURISTIC_SCALE
+        return estimates[node]
+
+    pq = MinHeap() # entries are (distance so far + estimate, distance so far, node)
+    pq.push((estimate(src), 0.0, src))
+    settled = 0
+
+    while len(pq) > 0:
+        _, current_dist, current = pq.pop()
+        # skip stale entries, a node can be re-expanded if a shorter path shows up later
+        if current_dist > distances[current]:
+            continue
+        settled += 1
+        if current == dst:
+            break
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = neighbors[k]
+            distance = current_dist + weights[k]
+            if distance < distances[neighbor]:
+                distances[neighbor] = distance
+                previous[neighbor] = current
+                pq.push((distance + estimate(neighbor), distance, neighbor))
+
+    if stats is not None:
+        stats['settled'] = settled
+        stats['pushes'] = pq.pushes
+    if distances[dst] == float('infinity'):
+        return None, None
+    return _path_names(graph, previous, dst), distances[dst]
+
+# bidirectional dijkstra: grow one search from each end (the graph is undirected) and stop
+# once the two frontiers can no longer produce anything shorter than the best meeting point
+def bidirectional_dijkstra(graph: Graph,
+                           source: str,
+                           destination: str,
+                           stats: Optional[dict] = None) -> Tuple[Optional[List[str]], Optional[float]]:
+    if source not in graph or destination not in graph:
+        return None, None
+    if source == destination:
+        if stats is not None:
+            stats['settled'] = 0
+        return [source], 0.0
+    graph = _as_compiled(graph)
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    src, dst = graph.ids[source], graph.ids[destination]
+
+    n = len(graph.names)
+    # index 0 is the search from the source, index 1 the search from the destination
+    distances = ([float('infinity')] * n, [float('infinity')] * n)
+    previous = ([-1] * n, [-1] * n)
+    visited = (bytearray(n), bytearray(n))
+    queues = (MinHeap(), MinHeap())
+    distances[0][src] = 0.0
+    distances[1][dst] = 0.0
+    queues[0].push((0.0, src))
+    queues[1].push((0.0, dst))
+    best = float('infinity')
+    meeting = -1
+    settled = 0
+
+    while len(queues[0]) > 0 and len(queues[1]) > 0:
+        top_forward, top_backward = queues[0].peek()[0], queues[1].peek()[0]
+        if top_forward + top_backward >= best:
+            break
+        side = 0 if top_forward <= top_backward else 1
+        dist, prev, seen = distances[side], previous[side], visited[side]
+        other = distances[1 - side]
+        current_dist, current = queues[side].pop()
+        if seen[current]:
+            continue
+        seen[current] = 1
+        settled += 1
+        for k in range(offsets[current], offsets[current + 1]):
+            neighbor = neighbors[k]
+            if seen[neighbor]:
+                continue
+            distance = current_dist + weights[k]
+            if distance < dist[neighbor]:
+                dist[neighbor] = distance
+                prev[neighbor] = current
+                queues[side].push((distance, neighbor))
+            # a node reached from both ends is a candidate meeting point
+            if dist[neighbor] + other[neighbor] < best:
+                best = dist[neighbor] + other[neighbor]
+                meeting = neighbor
+
+    if stats is not None:
+        stats['settled'] = settled
+        stats['pushes'] = queues[0].pushes + queues[1].pushes
+    if meeting == -1:
+        return None, None
+    # follow the destination-side tree from the meeting point, summing edge weights in path
+    # order so the distance comes out exactly as dijkstra would accumulate it
+    path = _path_names(graph, previous[0], meeting)
+    total = distances[0][meeting]
+    current = meeting
+    while previous[1][current] != -1:
+        nxt = previous[1][current]
+        total += min(weights[k] for k in range(offsets[current], offsets[current + 1])
+                     if neighbors[k] == nxt)
+        path.append(graph.names[nxt])
+        current = nxt
+    return path, total
+
+# precomputed routes between buildings: one full dijkstra per building fills a float32
+# distance matrix, and the predecessor trees (int32, one per source building) turn a
+# route request into a path walk. only max_trees trees are kept, least recently used
+# trees are dropped and recomputed on demand
+class RouteTable:
+    def __init__(self, graph: CompiledGraph, building_names, max_trees: int = 128):
+        self.graph = graph
+        self.buildings = sorted(b for b in building_names if b in graph)
+        self.index = {b: i for i, b in enumerate(self.buildings)}
+        self.max_trees = max_trees
+        count = len(self.buildings)
+        self.distances = array('f', [float('infinity')]) * (count * count)
+        self.trees = OrderedDict()  # building index -> array('i') of predecessors
+        self.lock = threading.Lock()
+        self.ready = False
+        self.cancelled = False
+        self.kept = set()  # rows carried over by derive(), which build() skips
+
+    def build(self, use_process: Optional[bool] = None) -> None:
+        """Run the single-source searches; meant to be called once, e.g. in a background thread.
+
+        The searches are pure Python, so in a thread they hold the GIL that
+        request threads need. Where fork is available they run in a child
+        process instead (use_process=None picks that), and the calling thread
+        only copies finished rows in while it waits on a pipe. Otherwise the
+        thread yields the GIL after every row.
+        """
+        rows = [i for i in range(len(self.buildings)) if i not in self.kept]
+        if use_process is None:
+            use_process = 'fork' in multiprocessing.get_all_start_methods()
+        if use_process and rows:
+            rows = self._build_in_child(rows)
+        count = len(self.buildings)
+        targets = [self.graph.ids[b] for b in self.buildings]
+        for i in rows:
+            if self.cancelled:
+                return
+            distances, previous = _dijkstra_ids(self.graph, self.graph.ids[self.buildings[i]])
+            self.distances[i * count:(i + 1) * count] = array('f', (distances[t] for t in targets))
+            self._store_tree(i, previous)
+            time.sleep(0)  # let a waiting request thread have the GIL between rows
+        if not self.cancelled:
+            self.ready = True
+
+    def _build_in_child(self, rows: List[int]) -> List[int]:
+        """Compute rows in a forked process; returns the rows it did not deliver."""
+        receiver, sender = multiprocessing.get_context('fork').Pipe(duplex=False)
+        child = multiprocessing.get_context('fork').Process(target=self._send_rows, args=(rows, sender), daemon=True)
+        child.start()
+        sender.close()
+        count = len(self.buildings)
+        # only the last max_trees rows' trees would survive the LRU anyway
+        with_tree = set(rows[-self.max_trees:])
+        try:
+            for done, i in enumerate(rows):
+                while not receiver.poll(0.1):
+                    if self.cancelled:
+                        return []
+                    if not child.is_alive() and not receiver.poll():
+                        return rows[done:]  # the child died; finish in this thread
+                self.distances[i * count:(i + 1) * count] = array('f', receiver.recv_bytes())
+                if i in with_tree:
+                    self._store_tree(i, array('i', receiver.recv_bytes()))
+            return []
+        except (EOFError, OSError):
+            return rows[done:]
+        finally:
+            receiver.close()
+            if child.is_alive():
+                child.terminate()
+            child.join()
+
+    def _send_rows(self, rows: List[int], sender) -> None:
+        # runs in the child: distances to every building per row, then the tree if the parent keeps it.
+        # Lowest CPU priority, so on a busy machine request threads are scheduled first
+        try:
+            os.nice(19)
+        except (AttributeError, OSError):
+            pass
+        targets = [self.graph.ids[b] for b in self.buildings]
+        with_tree = set(rows[-self.max_trees:])
+        for i in rows:
+            distances, previous = _dijkstra_ids(self.graph, self.graph.ids[self.buildings[i]])
+            sender.send_bytes(array('f', (distances[t] for t in targets)).tobytes())
+            if i in with_tree:
+                sender.send_bytes(array('i', previous).tobytes())
+        sender.close()
+
+    def derive(self, graph: CompiledGraph, changes: List[Tuple[int, int, float, float]]) -> 'RouteTable':
+        """Unbuilt table for graph, a copy of self.graph with the edge changes
+        [(u, v, old weight, new weight)] applied (weights are the minimum over
+        parallel u-v edges).
+
+        Rows none of whose distances can have changed are copied, so build()
+        only reruns the others. That is decided for every row from the distance
+        table (see _affected_rows), not only for rows whose tree is still in
+        the LRU. A kept row also keeps its stored tree while that is still a
+        shortest path tree on graph: none of its edges changed and no changed
+        edge gets short enough to improve a distance in it.
+        """
+        table = RouteTable(graph, self.buildings, self.max_trees)
+        if not self.ready:
+            return table
+        affected = self._affected_rows(graph, changes)
+        table.distances = array('f', self.distances)  # build() overwrites the affected rows
+        table.kept = set(range(len(self.buildings))) - affected
+        with self.lock:
+            trees = list(self.trees.items())
+        for i, tree in trees:
+            if i in table.kept and self._tree_unaffected(tree, self.graph.ids[self.buildings[i]], changes):
+                table.trees[i] = tree
+        return table
+
+    def _affected_rows(self, graph: CompiledGraph, changes) -> Set[int]:
+        """Rows in which some building distance may differ on graph.
+
+        An edge that got longer or closed only matters to a row if it lies on
+        one of the row's shortest paths: d(s, u) + old + d(v, t) equals the
+        table's d(s, t) for some building t, with distances on the old graph.
+        An edge that got shorter only matters if d(s, u) + new + d(v, t) beats
+        d(s, t), with distances on the new graph; a path that got shorter uses
+        some shortened edge, so that edge catches it. Edits change both
+        directions of a pair, so a search from u gives every d(s, u). This
+        costs one search from each end of every changed edge plus a pass over
+        the table, and table distances are float32, so near-ties count as
+        affected.
+        """
+        count = len(self.buildings)
+        targets = [self.graph.ids[b] for b in self.buildings]
+        target_set = set(targets)
+        limit = None
+        if np is not None:
+            table = np.frombuffer(self.distances, dtype=np.float32).reshape(count, count)
+            limit = table.astype(np.float64) * (1 + 1e-6) + 1e-6
+        searches = {}
+
+        def building_distances(g, node):
+            key = (g is graph, node)
+            if key not in searches:
+                distances, _ = _dijkstra_ids(g, node, targets=target_set)
+                searches[key] = [distances[t] for t in targets]
+            return searches[key]
+
+        affected = set()
+        for u, v, old, new in changes:
+            g, w = (graph, new) if new < old else (self.graph, old)
+            if w == INFINITY:
+                continue  # closed before an increase: no old path used it
+            from_u, from_v = building_distances(g, u), building_distances(g, v)
+            for to_start, from_end in ((from_u, from_v), (from_v, from_u)):
+                affected |= self._rows_through(to_start, w, from_end, limit)
+            if len(affected) == count:
+                break
+        return affected
+
+    def _rows_through(self, to_start: List[float], weight: float, from_end: List[float], limit) -> Set[int]:
+        """Rows s where to_start[s] + weight + from_end[t] is within float32
+        slack of d(s, t) for some building t. limit is that bound for every
+        table entry as a numpy matrix, or None without numpy."""
+        count = len(self.buildings)
+        if limit is not None:
+            end = np.asarray(from_end)
+            with np.errstate(invalid='ignore'):
+                slack = np.where(np.isinf(end), -np.inf, limit - end).max(axis=1)
+            start = np.asarray(to_start) + weight
+            return set(np.flatnonzero(np.isfinite(start) & (start <= slack)).tolist())
+        rows = set()
+        reachable = [(t, d) for t, d in enumerate(from_end) if d != INFINITY]
+        for s in range(count):
+            if to_start[s] == INFINITY:
+                continue
+            row = self.distances[s * count:(s + 1) * count]
+            base = to_start[s] + weight
+            if any(base + d <= row[t] * (1 + 1e-6) + 1e-6 for t, d in reachable):
+                rows.add(s)
+        return rows
+
+    def _tree_unaffected(self, tree, root: int, changes) -> bool:
+        distances = None
+        for u, v, old, new in changes:
+            if tree[v] == u or tree[u] == v:
+                return False
+            if new < old:
+                if distances is None:
+                    distances = self._tree_distances(tree, root)
+                du, dv = distances[u], distances[v]
+                if du == dv == INFINITY:
+                    continue  # both unreachable before, and the edge only joins them
+                if du + new <= dv or dv + new <= du:
+                    return False
+        return True
+
+    def _tree_distances(self, tree, root: int) -> List[float]:
+        """Distances from root along the tree, summed in the same order as dijkstra."""
+        graph = self.graph
+        offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+        distances = [None] * len(tree)
+        distances[root] = 0.0
+        for start in range(len(tree)):
+            chain = []
+            node = start
+            while node != -1 and distances[node] is None:
+                chain.append(node)
+                node = tree[node]
+            if node == -1:  # not connected to root
+                for x in chain:
+                    distances[x] = INFINITY
+                continue
+            for x in reversed(chain):
+                parent = tree[x]
+                distances[x] = distances[parent] + min(weights[k] for k in range(offsets[parent], offsets[parent + 1])
+                                                       if neighbors[k] == x)
+        return distances
+
+    def cancel(self) -> None:
+        """Make a running build() stop early; the table never becomes ready."""
+        self.cancelled = True
+
+    def _store_tree(self, i: int, previous: List[int]) -> array:
+        tree = array('i', previous)
+        with self.lock:
+            self.trees[i] = tree
+            self.trees.move_to_end(i)
+            while len(self.trees) > self.max_trees:
+                self.trees.popitem(last=False)
+        return tree
+
+    def _tree(self, i: int) -> Optional[array]:
+        with self.lock:
+            tree = self.trees.get(i)
+            if tree is not None:
+                self.trees.move_to_end(i)
+            return tree
+
+    def distance(self, source: str, destination: str) -> Optional[float]:
+        """Table distance (float32 precision) or None if unreachable."""
+        distance = self.distances[self.index[source] * len(self.buildings) + self.index[destination]]
+        return None if distance == float('infinity') else distance
+
+    def lookup(self, source: str, destination: str) -> Tuple[Optional[List[str]], Optional[float]]:
+        """Same result as dijkstra(graph, source, destination), from the stored trees."""
+        if source not in self.index or destination not in self.index:
+            return None, None
+        if source == destination:
+            return [source], 0.0
+        i, j = self.index[source], self.index[destination]
+        if self.distance(source, destination) is None:
+            return None, None
+        src, dst = self.graph.ids[source], self.graph.ids[destination]
+        tree = self._tree(i)
+        if tree is not None:
+            path_ids = self._walk(tree, dst)
+        else:
+            # the graph is undirected, so the destination's tree gives the same route reversed
+            tree = self._tree(j)
+            if tree is not None:
+                path_ids = self._walk(tree, src)
+                path_ids.reverse()
+            else:
+                _, previous = _dijkstra_ids(self.graph, src)
+                path_ids = self._walk(self._store_tree(i, previous), dst)
+        # sum full-precision weights in path order, as dijkstra accumulates them
+        graph = self.graph
+        total = 0.0
+        for u, v in zip(path_ids, path_ids[1:]):
+            total += min(graph.weights[k] for k in range(graph.offsets[u], graph.offsets[u + 1])
+                         if graph.neighbors[k] == v)
+        return [graph.names[u] for u in path_ids], total
+
+    @staticmethod
+    def _walk(tree, node: int) -> List[int]:
+        path = []
+        while node != -1:
+            path.append(node)
+            node = tree[node]
+        path.reverse()
+        return path
+
+    def nbytes(self) -> int:
+        with self.lock:
+            trees = sum(tree.itemsize * len(tree) for tree in self.trees.values())
+        return self.distances.itemsize * len(self.distances) + trees
+
 # --- [New Pruning Logic] ---
 def prune_mst(mst_edges: List[Tuple[str, str, float]], building_names: Set[str]) -> List[Tuple[str, str, float]]:
     """
     Removes 'fringe paths': edges that lead to a dead-end node that is NOT a building.
     Repeats until no such nodes exist.
+    Nodes can be names or CompiledGraph ids, as long as building_names uses the same kind.
     """
-    # Build adjacency for the MST
+    # Build adjacency for the MST; each neighbor entry carries the weight of the
+    # first edge listed between the two nodes
     adj = {}
+    degree = {}  # edge count per node, parallel edges included
     for u, v, w in mst_edges:
-        if u not in adj: adj[u] = []
-        if v not in adj: adj[v] = []
-        adj[u].append(v)
-        adj[v].append(u)
-        
-    changed = True
-    while changed:
-        changed = False
-        nodes_to_remove = []
-        
-        # Identify non-building leaves
-        for node in list(adj.keys()):
-            # Degree 1 means it's a leaf (dead end)
-            if len(adj[node]) == 1 and node not in building_names:
-                nodes_to_remove.append(node)
-        
-        if nodes_to_remove:
-            changed = True
-            for node in nodes_to_remove:
-                neighbor = adj[node][0]
-                adj[neighbor].remove(node)
-                del adj[node]
+        if u not in adj:
+            adj[u] = {}
+            degree[u] = 0
+        if v not in adj:
+            adj[v] = {}
+            degree[v] = 0
+        if v not in adj[u]: adj[u][v] = w
+        if u not in adj[v]: adj[v][u] = w
+        degree[u] += 1
+        degree[v] += 1
+
+    # Peel non-building leaves (degree 1 = dead end); a neighbor that becomes
+    # a leaf joins the queue, so every node and edge is handled once
+    leaves = deque(node for node in adj if degree[node] == 1 and node not in building_names)
+    while leaves:
+        node = leaves.popleft()
+        if degree[node] != 1:
+            continue  # its last neighbor was peeled first
+        neighbor = next(iter(adj[node]))
+        del adj[neighbor][node]
+        degree[neighbor] -= 1
+        del adj[node]
+        del degree[node]
+        if degree[neighbor] == 1 and neighbor not in building_names:
+            leaves.append(neighbor)
                 
     # Reconstruct edge list
     pruned = []
     seen = set()
     for u in adj:
-        for v in adj[u]:
+        for v, weight in adj[u].items():
             edge_key = tuple(sorted((u, v)))
             if edge_key not in seen:
-                # Find original weight
-                weight = 0
-                for ou, ov, ow in mst_edges:
-                    if (ou == u and ov == v) or (ou == v and ov == u):
-                        weight = ow
-                        break
                 pruned.append((u, v, weight))
                 seen.add(edge_key)
     return pruned
@@ -372,56 +1312,125 @@ class UnionFind:
             self.rank[r1] += 1
         return True
 
-def kruskal(graph, building_names):
+# map id-based mst edges back to node names
+def _edges_to_names(graph: CompiledGraph, edges):
+    return [(graph.names[u], graph.names[v], w) for u, v, w in edges]
+
+# closed edges (infinite weight) are left out; pass a list as tree_edges to also get the
+# unpruned tree as (u id, v id, weight) on the compiled graph
+def kruskal(graph, building_names, tree_edges=None):
     if not graph: return [], 0.0
+    graph = _as_compiled(graph)
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    # equal weights are ordered by node name, so ties resolve the same as on the dict graph
+    by_name = sorted(range(len(graph)), key=graph.names.__getitem__)
+    name_rank = [0] * len(graph)
+    for rank, u in enumerate(by_name):
+        name_rank[u] = rank
     edges = []
     seen = set()
-    for u in graph:
-        for v, w in graph[u]:
-            key = tuple(sorted((u, v)))
+    for u in range(len(graph)):
+        for k in range(offsets[u], offsets[u + 1]):
+            v = neighbors[k]
+            key = (u, v) if u < v else (v, u)
             if key not in seen:
-                edges.append((w, u, v))
+                if weights[k] != INFINITY:
+                    edges.append((weights[k], name_rank[u], name_rank[v]))
                 seen.add(key)
     edges.sort()
     
-    uf = UnionFind(list(graph.keys()))
+    uf = UnionFind(range(len(graph)))
     mst_edges = []
     
-    for w, u, v in edges:
+    for w, ru, rv in edges:
+        u, v = by_name[ru], by_name[rv]
         if uf.union(u, v):
             mst_edges.append((u, v, w))
+    if tree_edges is not None:
+        tree_edges.extend(mst_edges)
             
     # PRUNE THE RESULT
-    final_edges = prune_mst(mst_edges, building_names)
+    building_ids = {graph.ids[b] for b in building_names if b in graph}
+    final_edges = _edges_to_names(graph, prune_mst(mst_edges, building_ids))
     total_weight = sum(w for _, _, w in final_edges)
     return final_edges, total_weight
 
-def prim(graph, building_names, start_node=None):
+# prim's algorithm with the min-heap; restarts from the next unvisited node when a component
+# runs out, so a disconnected graph gives a minimum spanning forest
+def prim(graph, building_names, start_node=None, tree_edges=None):
     if not graph: return [], 0.0
-    if start_node is None: start_node = next(iter(graph))
+    graph = _as_compiled(graph)
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+    n = len(graph)
+    start = 0 if start_node is None else graph.ids[start_node]
     
-    visited = {start_node}
+    visited = bytearray(n)
     mst_edges = []
-    edges = []
+    # entries are (weight, push order, u, v); the push order keeps ties in insertion order
+    edges = MinHeap()
+    pushed = 0
+    remaining = n
+    next_root = 0
+    root = start
     
-    for v, w in graph[start_node]:
-        edges.append((w, start_node, v))
+    while remaining > 0:
+        if visited[root]:
+            while visited[next_root]:
+                next_root += 1
+            root = next_root
+        visited[root] = 1
+        remaining -= 1
+        for k in range(offsets[root], offsets[root + 1]):
+            if weights[k] != INFINITY:
+                edges.push((weights[k], pushed, root, neighbors[k]))
+                pushed += 1
         
-    while edges and len(visited) < len(graph):
-        # Manual min extract (replace with heap in prod)
-        edges.sort(key=lambda x: x[0])
-        w, u, v = edges.pop(0)
-        
-        if v in visited: continue
-        
-        visited.add(v)
-        mst_edges.append((u, v, w))
-        
-        for next_v, next_w in graph[v]:
-            if next_v not in visited:
-                edges.append((next_w, v, next_v))
+        while len(edges) > 0 and remaining > 0:
+            w, _, u, v = edges.pop()
+            
+            if visited[v]: continue
+            
+            visited[v] = 1
+            remaining -= 1
+            mst_edges.append((u, v, w))
+            
+            for k in range(offsets[v], offsets[v + 1]):
+                if not visited[neighbors[k]] and weights[k] != INFINITY:
+                    edges.push((weights[k], pushed, v, neighbors[k]))
+                    pushed += 1
+    if tree_edges is not None:
+        tree_edges.extend(mst_edges)
 
     # PRUNE THE RESULT
-    final_edges = prune_mst(mst_edges, building_names)
+    building_ids = {graph.ids[b] for b in building_names if b in graph}
+    final_edges = _edges_to_names(graph, prune_mst(mst_edges, building_ids))
     total_weight = sum(w for _, _, w in final_edges)
     return final_edges, total_weight
+
+# whether a minimum spanning forest (tree_edges from kruskal or prim) is still the one the
+# algorithm returns after the edge changes [(u, v, old weight, new weight)]. By the cycle
+# property only a changed tree edge, or a non-tree edge that drops to at most the heaviest
+# edge on the tree path between its ends, can change it
+def mst_unaffected(tree_edges: List[Tuple[int, int, float]],
+                   changes: List[Tuple[int, int, float, float]]) -> bool:
+    adj = {}
+    for u, v, w in tree_edges:
+        adj.setdefault(u, []).append((v, w))
+        adj.setdefault(v, []).append((u, w))
+    for u, v, old, new in changes:
+        if any(x == v for x, _ in adj.get(u, ())):
+            return False
+        if new >= old:
+            continue
+        # heaviest edge on the tree path u -> v, or unreachable
+        heaviest = {u: 0.0}
+        stack = [u]
+        while stack and v not in heaviest:
+            node = stack.pop()
+            for x, w in adj.get(node, ()):
+                if x not in heaviest:
+                    heaviest[x] = max(heaviest[node], w)
+                    stack.append(x)
+        if v not in heaviest or new <= heaviest[v]:
+            return False
+    return True
@@ -7,75 +7,237 @@
 # Rey Marvin C. Rizal
 # Rex Uriel I. Villaflores
 
-from flask import Flask, render_template, request, jsonify
+from flask import Flask, Response, g, render_template, request, jsonify, stream_with_context
+import hashlib
+import hmac
 import json
 import os
+import threading
+import time
+from functools import partial
 from pathlib import Path
-from algorithms import dijkstra, build_graph_from_geojson, kruskal, prim
-from hashtable import HashTable, load_building_data, get_embedded_data
+from algorithms import (dijkstra, astar, bidirectional_dijkstra, shortest_paths_from,
+                        multi_target_distances, kruskal, prim, HEAP_KINDS)
+from geojson_stream import file_hash
+from hashtable import HashTable, OpenAddressingHashTable
+from isochrone import isochrone
+from map_bundle import MapBundle
+from metrics import metrics, phase, begin_request, end_request, SamplingProfiler
+from route_cache import RouteCache
+from snapshot import load_map_data
 
 app = Flask(__name__)
 
+# priority queue for live dijkstra searches (algorithms.HEAP_KINDS); results are identical
+DIJKSTRA_HEAP = os.environ.get('DIJKSTRA_HEAP', 'binary')
+if DIJKSTRA_HEAP not in HEAP_KINDS:
+    raise ValueError(f"DIJKSTRA_HEAP must be one of {HEAP_KINDS}")
+
+# search functions selectable through the 'mode' field of /api/shortest-path
+SEARCH_MODES = {
+    'dijkstra': partial(dijkstra, heap=DIJKSTRA_HEAP),
+    'astar': astar,
+    'bidirectional': bidirectional_dijkstra,
+}
+
+# LRU cache of serialized /api/shortest-path responses, ROUTE_CACHE_SIZE building pairs
+route_cache = RouteCache(int(os.environ.get('ROUTE_CACHE_SIZE', 1024)))
+
+# Upper bound on pairs accepted by one /api/shortest-path/batch request
+MAX_BATCH_PAIRS = int(os.environ.get('MAX_BATCH_PAIRS', 10000))
+# Upper bound on buildings in one /api/distance-matrix request
+MAX_MATRIX_BUILDINGS = int(os.environ.get('MAX_MATRIX_BUILDINGS', 500))
+# Largest page /api/search returns
+MAX_SEARCH_LIMIT = 50
+# [lon, lat] route endpoints snap to the nearest pathway node within this many meters
+MAX_SNAP_DISTANCE = float(os.environ.get('MAX_SNAP_DISTANCE', 250))
+# Most results one /api/nearest request returns
+MAX_NEAREST = 50
+# Walking speed behind every 'time' in the responses, in meters per minute
+WALKING_SPEED = 80
+# Longest walk /api/isochrone covers
+MAX_ISOCHRONE_MINUTES = float(os.environ.get('MAX_ISOCHRONE_MINUTES', 30))
+
+# Where the map comes from, and how often the watcher checks it for edits (0 disables)
+GEOJSON_PATH = Path(__file__).parent / 'data' / 'campus_map.geojson'
+MAP_WATCH_INTERVAL = float(os.environ.get('MAP_WATCH_INTERVAL', 2.0))
+# Where /api/admin/edges saves the edge edits so restarts, reloads and other workers
+# keep them; EDGE_EDITS_PATH= (empty) keeps them in this process only
+EDGE_EDITS_PATH = os.environ.get('EDGE_EDITS_PATH', str(GEOJSON_PATH.with_name('edge_edits.json')))
+# Token required by the /api/admin endpoints; they are disabled when it is unset
+ADMIN_TOKEN = os.environ.get('ADMIN_TOKEN')
+# PRECOMPUTE_ROUTES=0 skips the background route table
+PRECOMPUTE_ROUTES = os.environ.get('PRECOMPUTE_ROUTES', '1') != '0'
+# ENABLE_PROFILING=1 lets any request add ?profile=1 to get folded stacks instead of its response
+ENABLE_PROFILING = os.environ.get('ENABLE_PROFILING', '0') != '0'
+
+metrics.describe('campus_http_requests_total', 'Requests handled, by endpoint, method and status.')
+metrics.describe('campus_http_request_duration_seconds', 'Request latency by endpoint and method.')
+metrics.describe('campus_search_settled_nodes_total', 'Nodes settled by live route searches.')
+metrics.describe('campus_heap_pushes_total', 'Heap pushes made by live route searches.')
+metrics.describe('campus_route_searches_total', 'Live route searches, by mode.')
+
+def load_bundle(precompute=True):
+    """Load the map (from a snapshot when one matches) and derive everything the routes need."""
+    start = time.perf_counter()
+    with phase('map_load'):
+        map_data = load_map_data(GEOJSON_PATH, os.environ.get('SNAPSHOT_DIR'),
+                                 use_snapshot=os.environ.get('USE_SNAPSHOT', '1') != '0')
+    source_label = 'snapshot' if map_data.from_snapshot else 'GeoJSON'
+    print(f"DEBUG: Loaded map with {map_data.feature_count} features from {source_label} "
+          f"in {time.perf_counter() - start:.3f}s")
+
+    # HASH_TABLE_BACKEND=open switches to the linear-probing table
+    table_class = OpenAddressingHashTable if os.environ.get('HASH_TABLE_BACKEND') == 'open' else HashTable
+    with phase('bundle_build'):
+        new_bundle = MapBundle(map_data, table_class, int(os.environ.get('ROUTE_TABLE_TREES', 128)))
+    try:
+        edits = load_edge_edits()
+    except (OSError, ValueError) as e:
+        print(f"WARNING: ignoring saved edge edits: {e}")
+        edits = {}
+    if edits:
+        # edits whose nodes are not on this map are skipped
+        new_bundle, _ = new_bundle.with_overlay(edits)
+        print(f"DEBUG: Applied {len(edits)} saved edge edits")
+    print(f"DEBUG: Built graph with {len(new_bundle.graph)} nodes and {len(new_bundle.buildings)} buildings")
+    print("DEBUG: Initialized hash table with building information")
+    print(f"DEBUG: Mapped {len(new_bundle.edge_geometries)} road segments to geometry")
+
+    # Precompute building-to-building routes in the background
+    # Requests fall back to a live search until the table is ready
+    if precompute and PRECOMPUTE_ROUTES:
+        new_bundle.start_precompute()
+    return new_bundle
+
+# Only serializes reloads and edge edits against each other; request handlers never take it
+reload_lock = threading.Lock()
+
+def reload_map(force=False):
+    """Build a bundle from the current GeoJSON and swap it in. Returns True if the map changed."""
+    global bundle
+    with reload_lock:
+        old = globals().get('bundle')
+        if not force and old is not None and file_hash(GEOJSON_PATH) == old.map_data.version:
+            return False
+        new_bundle = load_bundle(precompute=False)
+        if not EDGE_EDITS_PATH and old is not None and old.overlay:
+            # unsaved edge edits; ones whose nodes no longer exist are skipped
+            new_bundle, _ = new_bundle.with_overlay(old.overlay)
+        if PRECOMPUTE_ROUTES:
+            new_bundle.start_precompute()
+        bundle = new_bundle  # the swap: one reference assignment
+        if old is not None:
+            old.retire()
+        route_cache.clear()
+        print(f"DEBUG: Swapped in map version {new_bundle.version[:12]}")
+        return True
+
+EDGE_STATES = ('closed', 'weight', 'factor')
+
+def overlay_listing(overlay):
+    return [{'edge': [u, v], 'state': kind, 'value': value} for (u, v), (kind, value) in sorted(overlay.items())]
+
+def load_edge_edits():
+    """Edits saved in EDGE_EDITS_PATH as {(node1, node2): (state, value)}; {} if there are none."""
+    if not EDGE_EDITS_PATH:
+        return {}
+    try:
+        with open(EDGE_EDITS_PATH, encoding='utf-8') as f:
+            saved = json.load(f)
+    except FileNotFoundError:
+        return {}
+    if not isinstance(saved, dict) or not isinstance(saved.get('edges', []), list):
+        raise ValueError("expected {\"edges\": [...]}")
+    overlay = {}
+    for entry in saved.get('edges', []):
+        try:
+            edge, kind, value = entry['edge'], entry['state'], entry['value']
+            u, v = edge
+        except (KeyError, TypeError, ValueError):
+            raise ValueError(f"malformed edge edit {entry!r}")
+        if not isinstance(edge, list) or not isinstance(u, str) or not isinstance(v, str) or kind not in EDGE_STATES:
+            raise ValueError(f"malformed edge edit {entry!r}")
+        if kind != 'closed' and (isinstance(value, bool) or not isinstance(value, (int, float)) or not 0 < value < float('inf')):
+            raise ValueError(f"edge edit {entry!r} needs a positive value")
+        overlay[(u, v) if u <= v else (v, u)] = (kind, None if kind == 'closed' else float(value))
+    return overlay
+
+def save_edge_edits(overlay):
+    """Write the edits atomically, so a worker watching the file never reads half of it."""
+    path = Path(EDGE_EDITS_PATH)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump({'edges': overlay_listing(overlay)}, f, indent=1)
+    os.replace(tmp_path, path)
+
+def swap_overlay(old, overlay):
+    """Swap in old's map with overlay as its edge edits. Call with reload_lock held.
+
+    Returns (new bundle, changed edges, cached routes kept, cached routes dropped).
+    """
+    global bundle
+    new_bundle, changes = old.with_overlay(overlay)
+    # move still-valid cached routes to the new version before anything can be cached under it
+    routes_kept, routes_dropped = route_cache.migrate(old.version, new_bundle.version,
+                                                      new_bundle.route_unaffected)
+    if PRECOMPUTE_ROUTES:
+        new_bundle.start_precompute()
+    bundle = new_bundle  # the swap: one reference assignment
+    old.retire()
+    return new_bundle, changes, routes_kept, routes_dropped
+
+def apply_saved_edits():
+    """Swap in the saved edits if another worker or a hand edit changed them. Returns True if it did."""
+    overlay = load_edge_edits()
+    with reload_lock:
+        if overlay == bundle.overlay:
+            return False  # our own write, or nothing that matters
+        swap_overlay(bundle, overlay)
+        print(f"DEBUG: Applied {len(overlay)} saved edge edits")
+        return True
+
+def watch_map_file():
+    """Poll the mtime and size of the GeoJSON and of the saved edge edits; reload
+    the map or re-apply the edits once a change has stayed put for one interval."""
+    def stat(path):
+        try:
+            info = os.stat(path)
+            return (info.st_mtime_ns, info.st_size)
+        except OSError:
+            return None
+
+    watched = [(GEOJSON_PATH, reload_map)]
+    if EDGE_EDITS_PATH:
+        watched.append((Path(EDGE_EDITS_PATH), apply_saved_edits))
+    last = {path: stat(path) for path, _ in watched}
+    pending = {path: None for path, _ in watched}
+    while True:
+        time.sleep(MAP_WATCH_INTERVAL)
+        for path, action in watched:
+            current = stat(path)
+            if current is None or current == last[path]:
+                pending[path] = None
+                continue
+            if current != pending[path]:
+                pending[path] = current  # still being written, or just changed: check again next tick
+                continue
+            last[path], pending[path] = current, None
+            try:
+                action()
+            except Exception as e:
+                # keep serving the old map; the next edit triggers another attempt
+                print(f"WARNING: reloading {path.name} failed: {e}")
+
 # --- INITIALIZATION BLOCK ---
 # We use a global try-except block to ensure data loads before the app starts
 try:
-    # 1. Load GeoJSON Data
-    geojson_path = Path(__file__).parent / 'data' / 'campus_map.geojson'
-    with open(geojson_path, 'r') as f:
-        geojson_data = json.load(f)
-    print(f"DEBUG: Loaded GeoJSON with {len(geojson_data.get('features', []))} features")
-    
-    # 2. Build the Graph (Using the updated algorithms.py logic)
-    # Note: algorithms.py now returns (graph, all_coords, building_names)
-    graph, building_coords, building_names = build_graph_from_geojson(geojson_data)
-    
-    buildings = list(building_names)
-    print(f"DEBUG: Built graph with {len(graph)} nodes and {len(buildings)} buildings")
-
-    building_hash_table = HashTable(50)
-    geojson_buildings = load_building_data(geojson_path)
-    for building in geojson_buildings:
-        building_name = building['Name']
-        coordinates = building['Coordinates']
-        extra_info = get_embedded_data(building_name)
-        if extra_info:  # Only add buildings that are not excluded
-            building_hash_table.add(building_name, coordinates, extra_info)
-    print(f"DEBUG: Initialized hash table with building information")
-    
-    # 3. Build 'edge_geometries' map
-    # This maps specific node-to-node connections back to their curvy GeoJSON lines
-    edge_geometries = {} 
-    
-    # Helper to match coordinates with floating point tolerance
-    def coords_match(c1, c2):
-        if not c1 or not c2: return False
-        return abs(c1[0] - c2[0]) < 1e-7 and abs(c1[1] - c2[1]) < 1e-7
-    
-    for feature in geojson_data['features']:
-        geom = feature['geometry']
-        if geom['type'] in ['LineString', 'MultiLineString']:
-            # Handle both single and multi-lines
-            lines = geom['coordinates'] if geom['type'] == 'MultiLineString' else [geom['coordinates']]
-            
-            for coords in lines:
-                if len(coords) >= 2:
-                    start_c = coords[0]
-                    end_c = coords[-1]
-                    
-                    # Identify which nodes sit at these coordinates
-                    start_node = None
-                    end_node = None
-                    
-                    for node, c in building_coords.items():
-                        if coords_match(c, start_c): start_node = node
-                        if coords_match(c, end_c): end_node = node
-                    
-                    if start_node and end_node:
-                        # Store geometry for both directions
-                        edge_geometries[(start_node, end_node)] = coords
-                        edge_geometries[(end_node, start_node)] = list(reversed(coords))
-
-    print(f"DEBUG: Mapped {len(edge_geometries)} road segments to geometry")
+    # The current MapBundle: graph, coordinates, geometries, hash table, search index
+    # and route table for one version of the map. Handlers read it once per request.
+    bundle = load_bundle()
+
+    if MAP_WATCH_INTERVAL > 0:
+        threading.Thread(target=watch_map_file, daemon=True).start()
 
 except Exception as e:
     print(f"CRITICAL ERROR during initialization: {e}")
@@ -84,6 +246,54 @@ except Exception as e:
     # We don't raise here to allow Flask to start and show errors in browser, 
     # but the app will likely fail if data isn't loaded.
 
+# --- INSTRUMENTATION ---
+@app.before_request
+def start_request_timer():
+    g.request_start = time.perf_counter()
+    begin_request()
+    g.profiler = None
+    if ENABLE_PROFILING and request.args.get('profile') == '1':
+        g.profiler = SamplingProfiler().start()
+
+@app.after_request
+def record_request_metrics(response):
+    elapsed = time.perf_counter() - g.get('request_start', time.perf_counter())
+    # the rule, not the path, so building names do not each become a series
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    metrics.observe('campus_http_request_duration_seconds', elapsed, endpoint=endpoint, method=request.method)
+    metrics.inc('campus_http_requests_total', endpoint=endpoint, method=request.method,
+                status=str(response.status_code))
+
+    phases = end_request()
+    timings = [f"{name};dur={seconds * 1000:.2f}" for name, seconds in phases.items()]
+    timings.append(f"total;dur={elapsed * 1000:.2f}")
+    response.headers['Server-Timing'] = ', '.join(timings)
+
+    profiler = g.get('profiler')
+    if profiler is not None:
+        folded = profiler.stop()
+        response = Response(folded, mimetype='text/plain')
+        response.headers['X-Profile-Samples'] = str(sum(profiler.samples.values()))
+    return response
+
+def count_search(mode, stats):
+    metrics.inc('campus_route_searches_total', mode=mode)
+    metrics.inc('campus_search_settled_nodes_total', stats.get('settled', 0), mode=mode)
+    metrics.inc('campus_heap_pushes_total', stats.get('pushes', 0), mode=mode)
+
+@app.route('/metrics')
+def prometheus_metrics():
+    """Counters and latency histograms in the Prometheus text format."""
+    b = bundle
+    for key, value in route_cache.stats().items():
+        if isinstance(value, (int, float)):
+            metrics.set(f'campus_route_cache_{key}', value)
+    metrics.set('campus_map_nodes', len(b.graph))
+    metrics.set('campus_map_buildings', len(b.buildings))
+    metrics.set('campus_map_revision', b.revision)
+    metrics.set('campus_route_table_ready', 1 if b.get_route_table() is not None else 0)
+    return Response(metrics.render(), mimetype='text/plain; version=0.0.4')
+
 # --- ROUTES ---
 
 @app.route('/')
@@ -99,6 +309,7 @@ def get_buildings():
             'Kalimudan / Student Center Lane', 'EBL Dorm', 'Library', 
             'Training Gym', 'Sports Complex Stadium'
         ]
+        buildings = bundle.buildings
         main = [b for b in main_buildings if b in buildings]
         others = sorted([b for b in buildings if b not in main_buildings])
         return jsonify({'main': main, 'others': others, 'all': buildings})
@@ -109,32 +320,125 @@ def get_buildings():
 def get_building_info(building_name):
     """Fetch building information from the hash table."""
     try:
-        record = building_hash_table.get(building_name)
+        record = bundle.hash_table.get(building_name)
         if record:
             return jsonify({
-                'name': record['building_name'],
-                'coordinates': record['coordinates'],
-                'details': record['details']
+                'name': record.building_name,
+                'coordinates': record.coordinates,
+                'details': record.details
             })
         else:
             return jsonify({'error': 'Building not found'}), 404
     except Exception as e:
         return jsonify({'error': str(e)}), 500
 
-@app.route('/api/shortest-path', methods=['POST'])
-def shortest_path():
-    data = request.get_json()
-    source = data.get('source')
-    destination = data.get('destination')
+@app.route('/api/search')
+def search_buildings():
+    """Ranked building name matches for the typeahead: /api/search?q=lib&limit=10&offset=0"""
+    try:
+        limit = int(request.args.get('limit', 10))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'error': 'limit and offset must be integers'})
+    if limit < 1 or limit > MAX_SEARCH_LIMIT or offset < 0:
+        return jsonify({'error': f'limit must be 1-{MAX_SEARCH_LIMIT} and offset at least 0'})
+    return jsonify(bundle.search_index.search(request.args.get('q', ''), limit, offset))
 
-    if source not in buildings or destination not in buildings:
-        return jsonify({'error': 'Invalid building selection'})
+def parse_location(value):
+    """(lon, lat) from a [lon, lat] list, or None if it is not a valid coordinate."""
+    if not isinstance(value, list) or len(value) != 2:
+        return None
+    if not all(isinstance(v, (int, float)) and not isinstance(v, bool) for v in value):
+        return None
+    lon, lat = float(value[0]), float(value[1])
+    if not (-180 <= lon <= 180 and -90 <= lat <= 90):
+        return None
+    return lon, lat
 
-    full_path, distance = dijkstra(graph, source, destination)
+@app.route('/api/nearest')
+def nearest():
+    """Closest buildings (or pathway nodes with kind=nodes) to a location:
+    /api/nearest?lon=125.48&lat=7.08&k=5&radius=200
+    """
+    try:
+        location = parse_location([float(request.args['lon']), float(request.args['lat'])])
+        k = int(request.args.get('k', 5))
+        radius = float(request.args.get('radius', 'inf'))
+    except (KeyError, ValueError):
+        return jsonify({'error': 'lon and lat are required; k and radius must be numbers'})
+    if location is None:
+        return jsonify({'error': 'Invalid location'})
+    if k < 1 or k > MAX_NEAREST or not radius > 0:
+        return jsonify({'error': f'k must be 1-{MAX_NEAREST} and radius positive'})
+    kind = request.args.get('kind', 'buildings')
+    if kind not in ('buildings', 'nodes'):
+        return jsonify({'error': 'kind must be buildings or nodes'})
 
-    if full_path is None:
-        return jsonify({'error': 'No path found between the selected buildings'})
+    b = bundle
+    lon, lat = location
+    if kind == 'buildings':
+        found = b.building_index.nearest(lon, lat, k, radius)
+    else:
+        found = [(meters, b.graph.names[node]) for meters, node in b.node_index.nearest(lon, lat, k, radius)]
+    return jsonify({
+        'location': [lon, lat],
+        'kind': kind,
+        'results': [{'name': name, 'coord': b.building_coords.get(name), 'distance': round(meters, 2)}
+                    for meters, name in found],
+    })
+
+@app.route('/api/isochrone')
+def get_isochrone():
+    """Buildings and pathways within a walk of a building or location:
+    /api/isochrone?source=Library&minutes=5, or lon=..&lat=.. instead of source
+    """
+    try:
+        minutes = float(request.args.get('minutes', 5))
+    except ValueError:
+        return jsonify({'error': 'minutes must be a number'})
+    if not 0 <= minutes <= MAX_ISOCHRONE_MINUTES:
+        return jsonify({'error': f'minutes must be 0-{MAX_ISOCHRONE_MINUTES:g}'})
+    b = bundle
 
+    snapped = None
+    source = request.args.get('source')
+    if source is None:
+        try:
+            location = parse_location([float(request.args['lon']), float(request.args['lat'])])
+        except (KeyError, ValueError):
+            location = None
+        if location is None:
+            return jsonify({'error': 'Give a source building or a valid lon and lat'})
+        found = b.snap(location[0], location[1], MAX_SNAP_DISTANCE)
+        if found is None:
+            return jsonify({'error': f'No pathway within {MAX_SNAP_DISTANCE:g} m of the location'})
+        source, meters = found
+        snapped = {'location': list(location), 'node': source,
+                   'coord': b.building_coords.get(source), 'distance': round(meters, 2)}
+    elif source not in b.building_names:
+        return jsonify({'error': 'Invalid building selection'})
+
+    budget = minutes * WALKING_SPEED
+    stats = {}
+    with phase('search'):
+        result = isochrone(b.graph, b.building_coords, b.edge_geometries, source, budget, stats)
+    reached = result['reached']
+    buildings = sorted((d, name) for name, d in reached.items() if name in b.building_names)
+    with phase('serialize'):
+        return jsonify({
+            'source': source,
+            'snapped': snapped,
+            'minutes': minutes,
+            'budget': round(budget, 2),
+            'buildings': [{'name': name, 'distance': round(d, 2), 'time': round(d / WALKING_SPEED, 1)}
+                          for d, name in buildings],
+            'segments': result['segments'],
+            'hull': result['hull'],
+            'settled': stats.get('settled', 0),
+        })
+
+def build_route_payload(b, full_path, distance, mode, settled, precomputed):
+    """Response body for a route along full_path in bundle b."""
     # Construct path edges with geometry for visualization
     path_edges = []
     for i in range(len(full_path) - 1):
@@ -142,80 +446,460 @@ def shortest_path():
         node2 = full_path[i + 1]
         
         # Look up the curvy geometry if it exists
-        geometry = edge_geometries.get((node1, node2))
+        geometry = b.edge_geometries.get((node1, node2))
         
         # Get edge weight
-        weight = 0
-        for n, w in graph.get(node1, []):
-            if n == node2:
-                weight = w
-                break
+        weight = b.graph.edge_weight(node1, node2) or 0
 
         path_edges.append({
             'node1': node1,
             'node2': node2,
-            'coord1': building_coords.get(node1),
-            'coord2': building_coords.get(node2),
+            'coord1': b.building_coords.get(node1),
+            'coord2': b.building_coords.get(node2),
             'geometry': geometry, # This is what was missing!
             'weight': weight
         })
 
-    return jsonify({
-        'path': [n for n in full_path if n in buildings], 
+    return {
+        'path': [n for n in full_path if n in b.building_names], 
         'full_path': full_path,
         'path_edges': path_edges,
         'distance': round(distance, 2),
-        'time': round(distance / 80, 1)
-    })
+        'time': round(distance / WALKING_SPEED, 1),
+        'mode': mode,
+        'settled': settled,
+        'precomputed': precomputed
+    }
 
-@app.route('/api/mst')
-def mst():
-    algorithm = request.args.get('algorithm', 'kruskal').lower()
-    
-    # 1. Run the MST Algorithm
-    if algorithm == 'prim':
-        mst_edges, total_weight = prim(graph, set(buildings))
+def is_building(b, value):
+    """Whether a value from a JSON body names a building of bundle b."""
+    return isinstance(value, str) and value in b.building_names
+
+def search_function(b, mode):
+    """The search behind mode on bundle b; astar is answered by dijkstra once an edge edit
+    has made its straight-line heuristic unsafe, so it never returns a longer route."""
+    if mode == 'astar' and not b.astar_exact:
+        return SEARCH_MODES['dijkstra']
+    return SEARCH_MODES[mode]
+
+def json_response(body):
+    return Response(body, mimetype='application/json')
+
+@app.route('/api/shortest-path', methods=['POST'])
+def shortest_path():
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'})
+    source = data.get('source')
+    destination = data.get('destination')
+    mode = data.get('mode', 'dijkstra')
+    b = bundle
+
+    # names are checked to be strings first: a set or dict lookup of a JSON list or object
+    # would raise TypeError
+    if not isinstance(mode, str) or mode not in SEARCH_MODES:
+        return jsonify({'error': 'Invalid search mode'})
+    if isinstance(source, list) or isinstance(destination, list):
+        return location_route(b, source, destination, mode)
+    if not is_building(b, source) or not is_building(b, destination):
+        return jsonify({'error': 'Invalid building selection'})
+
+    cached = route_cache.get(b.version, mode, source, destination)
+    if cached is not None:
+        return json_response(cached)
+
+    stats = {}
+    table = b.get_route_table()
+    with phase('search'):
+        if table is not None:
+            full_path, distance = table.lookup(source, destination)
+        else:
+            full_path, distance = search_function(b, mode)(b.graph, source, destination, stats=stats)
+            count_search(mode, stats)
+
+    if full_path is None:
+        return jsonify({'error': 'No path found between the selected buildings'})
+
+    # Serialize both directions once; the reverse trip is the same path backwards
+    settled = stats.get('settled', 0)
+    with phase('geometry'):
+        forward = build_route_payload(b, full_path, distance, mode, settled, table is not None)
+        backward = build_route_payload(b, full_path[::-1], distance, mode, settled, table is not None)
+    with phase('serialize'):
+        forward, backward = jsonify(forward).get_data(), jsonify(backward).get_data()
+    route_cache.put(b.version, mode, source, destination, forward, backward, full_path)
+    return json_response(forward)
+
+def location_route(b, source, destination, mode):
+    """/api/shortest-path where either endpoint is a [lon, lat] location instead of a building.
+
+    A location snaps to the nearest pathway node; the response adds a 'snapped'
+    entry per location. These routes are not cached, since locations rarely repeat.
+    """
+    endpoints = []
+    snapped = {}
+    with phase('snap'):
+        for role, value in (('source', source), ('destination', destination)):
+            if not isinstance(value, list):
+                if not is_building(b, value):
+                    return jsonify({'error': 'Invalid building selection'})
+                endpoints.append(value)
+                continue
+            location = parse_location(value)
+            if location is None:
+                return jsonify({'error': f'{role} must be a building name or [lon, lat]'})
+            found = b.snap(location[0], location[1], MAX_SNAP_DISTANCE)
+            if found is None:
+                return jsonify({'error': f'No pathway within {MAX_SNAP_DISTANCE:g} m of the {role} location'})
+            node, meters = found
+            endpoints.append(node)
+            snapped[role] = {'location': list(location), 'node': node,
+                             'coord': b.building_coords.get(node), 'distance': round(meters, 2)}
+    source, destination = endpoints
+
+    stats = {}
+    table = b.get_route_table()
+    if table is not None and not (source in table.index and destination in table.index):
+        table = None  # the table only covers building to building routes
+    with phase('search'):
+        if table is not None:
+            full_path, distance = table.lookup(source, destination)
+        else:
+            full_path, distance = search_function(b, mode)(b.graph, source, destination, stats=stats)
+            count_search(mode, stats)
+
+    if full_path is None:
+        return jsonify({'error': 'No path found between the selected locations'})
+    with phase('geometry'):
+        payload = build_route_payload(b, full_path, distance, mode, stats.get('settled', 0), table is not None)
+        payload['snapped'] = snapped
+    with phase('serialize'):
+        return jsonify(payload)
+
+@app.route('/api/shortest-path/batch', methods=['POST'])
+def shortest_path_batch():
+    """Routes for many pairs, streamed back as one JSON object per line (NDJSON).
+
+    The body is either {"pairs": [[source, destination], ...]} or
+    {"source": ..., "destinations": [...]}. Pairs are grouped by source so each
+    source costs one search, and lines arrive grouped by source; 'index' is the
+    pair's position in the request.
+    """
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'})
+    if 'pairs' in data:
+        pairs = data['pairs']
+        if not isinstance(pairs, list) or not all(isinstance(p, list) and len(p) == 2 for p in pairs):
+            return jsonify({'error': 'pairs must be a list of [source, destination]'})
     else:
-        mst_edges, total_weight = kruskal(graph, set(buildings))
+        destinations = data.get('destinations')
+        if not isinstance(destinations, list):
+            return jsonify({'error': 'Provide pairs or a source with destinations'})
+        pairs = [[data.get('source'), destination] for destination in destinations]
+    if len(pairs) > MAX_BATCH_PAIRS:
+        return jsonify({'error': f'At most {MAX_BATCH_PAIRS} pairs per batch'})
+    if not all(isinstance(name, str) for pair in pairs for name in pair):
+        return jsonify({'error': 'Building names must be strings'})
+
+    b = bundle
+    groups = {}  # source -> [(index, destination)]
+    for index, (source, destination) in enumerate(pairs):
+        groups.setdefault(source, []).append((index, destination))
+
+    def line(index, source, destination, **fields):
+        return json.dumps({'index': index, 'source': source, 'destination': destination, **fields}) + '\n'
+
+    def with_route(index, source, destination, body):
+        # splice the serialized route in without parsing it again
+        head = json.dumps({'index': index, 'source': source, 'destination': destination})
+        return head[:-1] + ', "route": ' + body.decode('utf-8').rstrip() + '}\n'
+
+    def generate():
+        for source, group in groups.items():
+            pending = []
+            for index, destination in group:
+                if source not in b.building_names or destination not in b.building_names:
+                    yield line(index, source, destination, error='Invalid building selection')
+                    continue
+                cached = route_cache.get(b.version, 'dijkstra', source, destination)
+                if cached is not None:
+                    yield with_route(index, source, destination, cached)
+                else:
+                    pending.append((index, destination))
+            if not pending:
+                continue
+
+            stats = {}
+            table = b.get_route_table()
+            if table is not None:
+                results = {d: table.lookup(source, d) for _, d in pending}
+            else:
+                results = shortest_paths_from(b.graph, source, [d for _, d in pending], stats=stats)
+            for index, destination in pending:
+                full_path, distance = results[destination]
+                if full_path is None:
+                    yield line(index, source, destination, error='No path found between the selected buildings')
+                    continue
+                settled = stats.get('settled', 0)
+                forward = jsonify(build_route_payload(b, full_path, distance, 'dijkstra', settled,
+                                                      table is not None)).get_data()
+                backward = jsonify(build_route_payload(b, full_path[::-1], distance, 'dijkstra', settled,
+                                                       table is not None)).get_data()
+                route_cache.put(b.version, 'dijkstra', source, destination, forward, backward, full_path)
+                yield with_route(index, source, destination, forward)
+
+    return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+@app.route('/api/distance-matrix', methods=['POST'])
+def distance_matrix():
+    """Walking distances in meters between the requested buildings.
+
+    Body: {"buildings": [...]}. matrix[i][j] is the distance from buildings[i]
+    to buildings[j], or null when there is no path.
+    """
+    data = request.get_json(silent=True)
+    names = data.get('buildings') if isinstance(data, dict) else None
+    if not isinstance(names, list) or not all(isinstance(n, str) for n in names):
+        return jsonify({'error': 'buildings must be a list of building names'})
+    if len(names) > MAX_MATRIX_BUILDINGS:
+        return jsonify({'error': f'At most {MAX_MATRIX_BUILDINGS} buildings per matrix'})
+    b = bundle
+    if any(n not in b.building_names for n in names):
+        return jsonify({'error': 'Invalid building selection'})
+
+    count = len(names)
+    matrix = [[None] * count for _ in range(count)]
+    table = b.get_route_table()
+    for i, source in enumerate(names):
+        matrix[i][i] = 0.0
+        later = names[i + 1:]
+        if not later:
+            continue
+        # The graph is undirected: one search per row fills the rest of the row and column
+        if table is not None:
+            row = {t: (table.distance(source, t) if source in table.index and t in table.index else None)
+                   for t in later}
+        else:
+            row = multi_target_distances(b.graph, source, later)
+        for j, target in enumerate(later, start=i + 1):
+            distance = row[target]
+            if distance is not None:
+                matrix[i][j] = matrix[j][i] = round(distance, 2)
+
+    return jsonify({'buildings': names, 'matrix': matrix, 'precomputed': table is not None})
+
+@app.route('/api/cache-stats')
+def cache_stats():
+    """Route cache counters, for sizing ROUTE_CACHE_SIZE."""
+    return jsonify({'routes': route_cache.stats()})
+
+def admin_denied():
+    """Error response unless the request carries the admin token."""
+    if not ADMIN_TOKEN:
+        return jsonify({'error': 'Admin API is disabled; set ADMIN_TOKEN'}), 403
+    # compared as bytes: compare_digest refuses str with non-ASCII characters
+    supplied = request.headers.get('X-Admin-Token', '').encode('utf-8')
+    if not hmac.compare_digest(supplied, ADMIN_TOKEN.encode('utf-8')):
+        return jsonify({'error': 'Invalid admin token'}), 403
+    return None
+
+@app.route('/api/admin/reload', methods=['POST'])
+def admin_reload():
+    """Rebuild the map from the GeoJSON and swap it in.
+
+    Runs in a background thread and answers 202 right away; send
+    {"wait": true} to get the outcome instead. {"force": true} rebuilds even
+    when the file is unchanged.
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    data = request.get_json(silent=True)
+    if data is None:
+        data = {}  # no body: reload in the background
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    force = bool(data.get('force'))
+    if not data.get('wait'):
+        threading.Thread(target=reload_map, args=(force,), daemon=True).start()
+        return jsonify({'status': 'reloading', 'version': bundle.version}), 202
+    try:
+        changed = reload_map(force)
+    except Exception as e:
+        return jsonify({'error': f'Reload failed: {e}', 'version': bundle.version}), 500
+    return jsonify({'status': 'reloaded' if changed else 'unchanged', 'version': bundle.version})
+
+EDGE_ACTIONS = ('close', 'reopen', 'reweight')
+
+@app.route('/api/admin/edges', methods=['GET', 'POST'])
+def admin_edges():
+    """Close, reopen or reweight pathway edges on the live map, without a rebuild.
+
+    Body: {"action": "close" | "reopen" | "reweight",
+           "edges": [[node1, node2], ...] and/or "features": [feature index, ...],
+           "weight": meters or "factor": multiplier (reweight only)}
+    A feature index is the position of a LineString/MultiLineString in the
+    GeoJSON 'features' array and selects every edge it draws. Edits replace
+    any earlier edit of the same edge; reopen restores the GeoJSON weight.
+    GET lists the edits in effect. Edits are saved to EDGE_EDITS_PATH, so they
+    survive restarts and map reloads and reach other workers watching the file;
+    with EDGE_EDITS_PATH empty they only last as long as this process.
+    'persisted' in the response says which applies.
+    """
+    denied = admin_denied()
+    if denied:
+        return denied
+    if request.method == 'GET':
+        b = bundle
+        return jsonify({'version': b.version, 'edges': overlay_listing(b.overlay), 'persisted': bool(EDGE_EDITS_PATH)})
+
+    data = request.get_json(silent=True)
+    if not isinstance(data, dict):
+        return jsonify({'error': 'Request body must be a JSON object'}), 400
+    action = data.get('action')
+    if action not in EDGE_ACTIONS:
+        return jsonify({'error': f"action must be one of {', '.join(EDGE_ACTIONS)}"}), 400
+    edges = data.get('edges', [])
+    features = data.get('features', [])
+    if not isinstance(edges, list) or not all(
+            isinstance(e, list) and len(e) == 2 and all(isinstance(n, str) for n in e) for e in edges):
+        return jsonify({'error': 'edges must be a list of [node1, node2]'}), 400
+    if not isinstance(features, list) or not all(isinstance(f, int) and not isinstance(f, bool) for f in features):
+        return jsonify({'error': 'features must be a list of feature indexes'}), 400
+    if not edges and not features:
+        return jsonify({'error': 'Provide edges or features'}), 400
+
+    state = None
+    if action == 'close':
+        state = ('closed', None)
+    elif action == 'reweight':
+        for kind in ('weight', 'factor'):
+            value = data.get(kind)
+            if isinstance(value, (int, float)) and not isinstance(value, bool) and 0 < value < float('inf'):
+                state = (kind, float(value))
+                break
+        if state is None:
+            return jsonify({'error': 'reweight needs a positive weight (meters) or factor'}), 400
+
+    with reload_lock:
+        old = bundle
+        graph = old.graph
+        pairs = set()
+        for u, v in edges:
+            if u not in graph.ids or v not in graph.ids or not graph.pair_slots(graph.ids[u], graph.ids[v]):
+                return jsonify({'error': f'No edge between {u} and {v}'}), 400
+            pairs.add((u, v) if u <= v else (v, u))
+        for index in features:
+            if index not in old.map_data.feature_edges:
+                return jsonify({'error': f'Feature {index} draws no pathway edges'}), 400
+            pairs.update((u, v) if u <= v else (v, u) for u, v in old.map_data.feature_edges[index] if u != v)
+
+        overlay = dict(old.overlay)
+        for pair in pairs:
+            if state is None:
+                overlay.pop(pair, None)
+            else:
+                overlay[pair] = state
+        if EDGE_EDITS_PATH:
+            try:
+                save_edge_edits(overlay)
+            except OSError as e:
+                return jsonify({'error': f'Could not save edge edits: {e}'}), 500
+        new_bundle, changes, routes_kept, routes_dropped = swap_overlay(old, overlay)
+
+    table = new_bundle.route_table
+    return jsonify({
+        'version': new_bundle.version,
+        'edges': overlay_listing(new_bundle.overlay),
+        'persisted': bool(EDGE_EDITS_PATH),
+        'changed_edges': len(changes),
+        'invalidated': {
+            'route_table_rows': {'kept': len(table.kept), 'recomputed': len(table.buildings) - len(table.kept)},
+            'routes': {'kept': routes_kept, 'dropped': routes_dropped},
+            'mst': {algorithm: ('kept' if algorithm in new_bundle.mst_cache else 'dropped')
+                    for algorithm in old.mst_cache},
+        },
+    })
+
+# Serialized /api/mst responses are kept per bundle (MapBundle.mst_cache) with their ETags,
+# so a reloaded map never hits old entries.
+MST_ALGORITHMS = ('kruskal', 'prim')
+
+def build_mst_response(b, algorithm, tree_edges=None):
+    graph, building_names, building_coords, edge_geometries = (
+        b.graph, b.building_names, b.building_coords, b.edge_geometries)
+
+    # 1. Run the MST Algorithm (tree_edges, when given, receives the unpruned tree)
+    with phase('mst'):
+        if algorithm == 'prim':
+            mst_edges, total_weight = prim(graph, building_names, tree_edges=tree_edges)
+        else:
+            mst_edges, total_weight = kruskal(graph, building_names, tree_edges=tree_edges)
 
     # 2. Format for Frontend
-    all_edges_with_coords = []
-    building_edges = []
+    with phase('geometry'):
+        all_edges_with_coords = []
+        building_edges = []
     
-    for edge in mst_edges:
-        node1, node2, weight = edge
+        for edge in mst_edges:
+            node1, node2, weight = edge
         
-        # Retrieve strict geometry if available
-        geometry = edge_geometries.get((node1, node2)) or edge_geometries.get((node2, node1))
+            # Retrieve strict geometry if available
+            geometry = edge_geometries.get((node1, node2)) or edge_geometries.get((node2, node1))
         
-        # Check if this is a direct connection between two buildings
-        is_direct = (node1 in buildings) and (node2 in buildings)
+            # Check if this is a direct connection between two buildings
+            is_direct = (node1 in building_names) and (node2 in building_names)
 
-        edge_data = {
-            'node1': node1,
-            'node2': node2,
-            'weight': round(weight, 2),
-            'coord1': building_coords.get(node1),
-            'coord2': building_coords.get(node2),
-            'geometry': geometry,
-            'is_building_edge': is_direct
-        }
+            edge_data = {
+                'node1': node1,
+                'node2': node2,
+                'weight': round(weight, 2),
+                'coord1': building_coords.get(node1),
+                'coord2': building_coords.get(node2),
+                'geometry': geometry,
+                'is_building_edge': is_direct
+            }
         
-        all_edges_with_coords.append(edge_data)
-        if is_direct:
-            building_edges.append(edge_data)
+            all_edges_with_coords.append(edge_data)
+            if is_direct:
+                building_edges.append(edge_data)
 
     # Calculate the sum of weights for building-only edges
     building_edges_weight = sum(e['weight'] for e in building_edges)
 
-    return jsonify({
-        'edges': building_edges,
-        'all_edges': all_edges_with_coords,
-        'total_weight': round(total_weight, 2),
-        'building_edges_weight': round(building_edges_weight, 2), # <--- This was missing!
-        'algorithm': algorithm,
-        'buildings_connected_directly': len(building_edges)
-    })
+    with phase('serialize'):
+        return jsonify({
+            'edges': building_edges,
+            'all_edges': all_edges_with_coords,
+            'total_weight': round(total_weight, 2),
+            'building_edges_weight': round(building_edges_weight, 2), # <--- This was missing!
+            'algorithm': algorithm,
+            'buildings_connected_directly': len(building_edges)
+        })
+
+@app.route('/api/mst')
+def mst():
+    algorithm = request.args.get('algorithm', 'kruskal').lower()
+    b = bundle
+    if algorithm not in MST_ALGORITHMS:
+        # Unknown names still fall back to kruskal, just without caching
+        return build_mst_response(b, algorithm)
+
+    cached = b.mst_cache.get(algorithm)
+    if cached is None:
+        # the unpruned tree lets an edge edit tell whether this response is still valid
+        tree_edges = []
+        body = build_mst_response(b, algorithm, tree_edges).get_data()
+        cached = (body, hashlib.sha256(body).hexdigest()[:32], tree_edges)
+        b.mst_cache[algorithm] = cached
+
+    body, etag, _ = cached
+    response = Response(body, mimetype='application/json')
+    response.set_etag(etag)
+    # Clients may keep the body but must revalidate, which is a cheap 304 when unchanged
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 if __name__ == '__main__':
     print("Starting Flask application...")
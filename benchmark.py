@@ -0,0 +1,1116 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""Benchmarks for the campus navigation backend.
+
+Run e.g. `python benchmark.py build --vertices 50000 --buildings 5000`.
+Maps are synthetic street grids from mapgen.py so the sizes can go far
+beyond the shipped campus map. `suite` writes its timings as JSON and
+`compare` checks one such file against another for regressions.
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+import hashtable
+from hashtable import HashTable, OpenAddressingHashTable, building_data_from_geojson, get_embedded_data
+from algorithms import (build_graph_from_geojson, dijkstra, astar, bidirectional_dijkstra,
+                        kruskal, prim, prune_mst, astar_admissible, CompiledGraph, EdgeGeometries, RouteTable, HEAP_KINDS, single_source_distances, haversine_batch, haversine_distance,
+                        manual_haversine_distance)
+from geojson_stream import iter_features
+from snapshot import build_map_data, build_map_data_from_features
+from map_bundle import MapBundle
+import search as search_module
+from search import BuildingSearchIndex
+from isochrone import isochrone
+from spatial import SpatialGrid, KDTree
+from mapgen import generate_map, BASE_LON, BASE_LAT, SPACING
+
+def line_vertices(geojson_data: dict):
+    for feature in geojson_data["features"]:
+        geom = feature["geometry"]
+        if geom["type"] == "LineString":
+            yield from geom["coordinates"]
+        elif geom["type"] == "MultiLineString":
+            for line in geom["coordinates"]:
+                yield from line
+
+
+def legacy_build_graph(geojson_data: dict):
+    """The original builder: linear building scan per vertex and a neighbor-list
+    scan per edge for duplicates. Distances use today's haversine_distance, so
+    only the structure is compared exactly."""
+    buildings = {}
+    for feature in geojson_data['features']:
+        if feature['geometry']['type'] == 'Point':
+            name = feature['properties'].get('Name', '')
+            if name and name != 'Campus Pathways':
+                coords = feature['geometry']['coordinates']
+                buildings[name] = (coords[0], coords[1])
+
+    def get_building_at_coord(lon, lat):
+        for building_name, (b_lon, b_lat) in buildings.items():
+            if abs(lon - b_lon) < 0.0000001 and abs(lat - b_lat) < 0.0000001:
+                return building_name
+        return None
+
+    coord_to_node = {}
+    node_coords = {}
+    node_counter = 0
+
+    def get_node_id(lon, lat):
+        nonlocal node_counter
+        building_name = get_building_at_coord(lon, lat)
+        if building_name:
+            return building_name
+        coord_key = (round(lon, 8), round(lat, 8))
+        if coord_key in coord_to_node:
+            return coord_to_node[coord_key]
+        node_id = f"node_{node_counter}"
+        coord_to_node[coord_key] = node_id
+        node_coords[node_id] = (lon, lat)
+        node_counter += 1
+        return node_id
+
+    graph = {}
+    for feature in geojson_data['features']:
+        geom = feature['geometry']
+        if geom['type'] not in ('LineString', 'MultiLineString'):
+            continue
+        for line_coords in geom['coordinates'] if geom['type'] == 'MultiLineString' else [geom['coordinates']]:
+            for i in range(len(line_coords) - 1):
+                start_lon, start_lat = line_coords[i][0], line_coords[i][1]
+                end_lon, end_lat = line_coords[i + 1][0], line_coords[i + 1][1]
+                start_node = get_node_id(start_lon, start_lat)
+                end_node = get_node_id(end_lon, end_lat)
+                distance = haversine_distance((start_lon, start_lat), (end_lon, end_lat))
+                if start_node not in graph:
+                    graph[start_node] = []
+                if end_node not in graph:
+                    graph[end_node] = []
+                edge_exists = False
+                for neighbor, dist in graph[start_node]:
+                    if neighbor == end_node and abs(dist - distance) < 0.001:
+                        edge_exists = True
+                        break
+                if not edge_exists:
+                    graph[start_node].append((end_node, distance))
+                    graph[end_node].append((start_node, distance))
+    return graph, {**buildings, **node_coords}, set(buildings)
+
+
+def legacy_edge_geometries(geojson_data: dict, all_coords: dict) -> dict:
+    """The original app.py mapping: every line's endpoints matched against every node."""
+    def coords_match(c1, c2):
+        if not c1 or not c2: return False
+        return abs(c1[0] - c2[0]) < 1e-7 and abs(c1[1] - c2[1]) < 1e-7
+
+    edge_geometries = {}
+    for feature in geojson_data['features']:
+        geom = feature['geometry']
+        if geom['type'] in ['LineString', 'MultiLineString']:
+            lines = geom['coordinates'] if geom['type'] == 'MultiLineString' else [geom['coordinates']]
+            for coords in lines:
+                if len(coords) >= 2:
+                    start_node = None
+                    end_node = None
+                    for node, c in all_coords.items():
+                        if coords_match(c, coords[0]): start_node = node
+                        if coords_match(c, coords[-1]): end_node = node
+                    if start_node and end_node:
+                        edge_geometries[(start_node, end_node)] = coords
+                        edge_geometries[(end_node, start_node)] = list(reversed(coords))
+    return edge_geometries
+
+
+def legacy_edge_weight(graph: dict, node1: str, node2: str) -> float:
+    """The original /api/shortest-path lookup: first match in node1's neighbor list."""
+    for n, w in graph.get(node1, []):
+        if n == node2:
+            return w
+    return 0
+
+
+def check_builder(label: str, data: dict) -> None:
+    """build_map_data must give the original builder's graph, coordinates and geometries."""
+    start = time.perf_counter()
+    legacy_graph, legacy_coords, legacy_buildings = legacy_build_graph(data)
+    legacy_geometries = legacy_edge_geometries(data, legacy_coords)
+    legacy_time = time.perf_counter() - start
+    start = time.perf_counter()
+    map_data = build_map_data(data, "benchmark")
+    new_time = time.perf_counter() - start
+    graph = map_data.graph
+
+    def fail(what):
+        raise SystemExit(f"{label}: {what} differs from the original builder")
+
+    adjacency = graph.to_adjacency()
+    if list(adjacency) != list(legacy_graph):
+        fail("node order")
+    for node, edges in legacy_graph.items():
+        new_edges = adjacency[node]
+        if [n for n, _ in new_edges] != [n for n, _ in edges]:
+            fail(f"neighbor list of {node}")
+        # 1e-9 m leaves room for the batched haversine's last bits
+        if any(abs(w - old) > 1e-9 for (_, w), (_, old) in zip(new_edges, edges)):
+            fail(f"edge weights of {node}")
+        for neighbor, _ in edges:
+            if abs(graph.edge_weight(node, neighbor) - legacy_edge_weight(legacy_graph, node, neighbor)) > 1e-9:
+                fail(f"edge_weight({node}, {neighbor})")
+    if map_data.building_names != legacy_buildings:
+        fail("building set")
+    for node, (lon, lat) in legacy_coords.items():
+        if map_data.building_coords.get(node) != (lon, lat):
+            fail(f"coordinates of {node}")
+        i = graph.ids[node] if node in graph else None
+        if i is not None and (graph.lons[i], graph.lats[i]) != (lon, lat):
+            fail(f"compiled coordinates of {node}")
+    if map_data.building_coords.keys() != legacy_coords.keys():
+        fail("coordinate keys")
+    if dict(map_data.edge_geometries.items()) != legacy_geometries:
+        fail("edge_geometries")
+    print(f"{label}: {len(graph)} nodes, {len(graph.neighbors)} directed edges, "
+          f"{len(legacy_geometries)} geometries identical; build {new_time:.3f}s, original {legacy_time:.3f}s")
+
+
+def bench_build(args) -> None:
+    with open(args.geojson, encoding="utf-8") as f:
+        check_builder(args.geojson, json.load(f))
+    checked = generate_map(args.check_vertices, args.check_vertices // 50, density=0.2, segment_length=7,
+                           multiline=0.3, jitter=0.3, seed=args.seed)
+    # repeat some streets, one of them reversed, so duplicate edges are exercised
+    streets = [f for f in checked["features"] if f["geometry"]["type"] == "LineString"]
+    for k, feature in enumerate(streets[::5]):
+        coords = feature["geometry"]["coordinates"]
+        checked["features"].append({"type": "Feature", "properties": {"Name": "Campus Pathways"},
+                                    "geometry": {"type": "LineString",
+                                                 "coordinates": coords[::-1] if k % 2 else coords}})
+    check_builder(f"mapgen {args.check_vertices}", checked)
+
+    data = generate_map(args.vertices, args.buildings, seed=args.seed)
+    start = time.perf_counter()
+    graph, all_coords, building_names = build_graph_from_geojson(data)
+    elapsed = time.perf_counter() - start
+    print(f"build_graph_from_geojson: {len(graph)} nodes, {len(building_names)} buildings "
+          f"in {elapsed:.3f}s")
+
+    # snapping alone: grid lookup vs the old linear scan over every building
+    tolerance = 0.0000001
+    points = [(f["properties"]["Name"], f["geometry"]["coordinates"])
+              for f in data["features"] if f["geometry"]["type"] == "Point"]
+    vertices = list(line_vertices(data))
+    grid = SpatialGrid(2 * tolerance)
+    for name, (lon, lat) in points:
+        grid.insert(name, lon, lat)
+    start = time.perf_counter()
+    for lon, lat in vertices:
+        grid.find(lon, lat, tolerance)
+    grid_time = time.perf_counter() - start
+
+    sample = vertices[:args.linear_sample]
+    start = time.perf_counter()
+    for lon, lat in sample:
+        for name, (b_lon, b_lat) in points:
+            if abs(lon - b_lon) < tolerance and abs(lat - b_lat) < tolerance:
+                break
+    linear_time = (time.perf_counter() - start) * len(vertices) / max(1, len(sample))
+    print(f"snapping {len(vertices)} vertices: grid {grid_time:.3f}s, "
+          f"linear scan ~{linear_time:.3f}s (extrapolated from {len(sample)})")
+
+
+def bench_compiled(args) -> None:
+    data = generate_map(args.vertices, args.buildings, seed=args.seed)
+    built, all_coords, building_names = build_graph_from_geojson(data)
+    # measure freshly allocated copies of both forms (node names are shared by both)
+    tracemalloc.start()
+    compiled = CompiledGraph.from_adjacency(built)
+    compiled_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    tracemalloc.start()
+    graph = compiled.to_adjacency()
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+    del built
+    edges = len(compiled.neighbors)
+    print(f"{len(graph)} nodes, {edges} directed edges")
+    print(f"memory: dict graph {dict_bytes / 1e6:.1f} MB, "
+          f"compiled graph {compiled_bytes / 1e6:.1f} MB")
+
+    rng = random.Random(args.seed)
+    names = sorted(building_names)
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.queries)]
+    for label, g in (("dict", graph), ("compiled", compiled)):
+        start = time.perf_counter()
+        for source, destination in pairs:
+            dijkstra(g, source, destination)
+        elapsed = time.perf_counter() - start
+        print(f"dijkstra on {label}: {elapsed / len(pairs) * 1000:.2f} ms/query")
+
+
+def bench_haversine(args) -> None:
+    rng = random.Random(args.seed)
+    starts = [(BASE_LON + rng.uniform(-0.05, 0.05), BASE_LAT + rng.uniform(-0.05, 0.05))
+              for _ in range(args.segments)]
+    # mostly short campus-sized segments plus some long ones
+    ends = [(lon + rng.uniform(-0.001, 0.001) * (100 if k % 10 == 0 else 1),
+             lat + rng.uniform(-0.001, 0.001) * (100 if k % 10 == 0 else 1))
+            for k, (lon, lat) in enumerate(starts)]
+
+    batch = haversine_batch(starts, ends)
+    fallback = haversine_batch(starts, ends, use_numpy=False)
+    reference = [manual_haversine_distance(s, e) for s, e in zip(starts, ends)]
+    # manual_sqrt stops once a Newton step is below 1e-10, so the series version is
+    # only good to a few millimeters on short segments; allow 1 cm against it
+    for label, values in (("batch", batch), ("fallback", fallback)):
+        worst = max(abs(v - r) for v, r in zip(values, reference))
+        print(f"{label} vs manual series: max abs error {worst:.3e} m")
+        if worst > 0.01:
+            raise SystemExit(f"{label} disagrees with the manual haversine")
+    worst_rel = max(abs(b - f) / f for b, f in zip(batch, fallback) if f > 0)
+    print(f"batch vs fallback: max rel error {worst_rel:.3e}")
+    if worst_rel > 1e-12:
+        raise SystemExit("numpy and math batches disagree")
+
+    def timed(label, fn):
+        start = time.perf_counter()
+        fn()
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {elapsed:.3f}s, {len(starts) / elapsed / 1e6:.2f} M segments/s")
+
+    timed("manual series (old per-edge path)",
+          lambda: [manual_haversine_distance(s, e) for s, e in zip(starts, ends)])
+    timed("haversine_distance scalar", lambda: [haversine_distance(s, e) for s, e in zip(starts, ends)])
+    timed("haversine_batch fallback", lambda: haversine_batch(starts, ends, use_numpy=False))
+    timed("haversine_batch numpy", lambda: haversine_batch(starts, ends))
+
+
+def random_geometric_graph(side: int, rng: random.Random):
+    """Jittered grid with randomly dropped and detoured edges, weights >= straight line."""
+    coords = {}
+    for i in range(side):
+        for j in range(side):
+            coords[f"n{i}_{j}"] = (BASE_LON + (i + rng.uniform(-0.4, 0.4)) * SPACING * 10,
+                                   BASE_LAT + (j + rng.uniform(-0.4, 0.4)) * SPACING * 10)
+    graph = {name: [] for name in coords}
+    for i in range(side):
+        for j in range(side):
+            for di, dj in ((1, 0), (0, 1), (1, 1)):
+                if i + di >= side or j + dj >= side or rng.random() < 0.25:
+                    continue
+                u, v = f"n{i}_{j}", f"n{i + di}_{j + dj}"
+                w = haversine_distance(coords[u], coords[v]) * rng.uniform(1.0, 1.5)
+                graph[u].append((v, w))
+                graph[v].append((u, w))
+    return graph, coords
+
+
+def bench_search(args) -> None:
+    # property check first: all modes must agree with dijkstra on random graphs
+    rng = random.Random(args.seed)
+    for _ in range(args.graphs):
+        graph, coords = random_geometric_graph(rng.randint(3, 25), rng)
+        compiled = CompiledGraph.from_adjacency(graph, coords)
+        names = list(graph)
+        for _ in range(20):
+            source, destination = rng.choice(names), rng.choice(names)
+            expected = dijkstra(compiled, source, destination)
+            for label, result in (("astar", astar(compiled, source, destination)),
+                                  ("bidirectional", bidirectional_dijkstra(compiled, source, destination)),
+                                  ("dict astar", astar(graph, source, destination, coords))):
+                if result != expected:
+                    raise SystemExit(f"{label} {source}->{destination}: {result} != {expected}")
+    print(f"search modes agree with dijkstra on {args.graphs} random graphs")
+
+    # edges reweighted below their straight-line length make astar's heuristic overestimate;
+    # astar_admissible must notice, which is what makes the app answer astar with dijkstra
+    suboptimal = queries = 0
+    for _ in range(args.graphs):
+        graph, coords = random_geometric_graph(rng.randint(3, 25), rng)
+        compiled = CompiledGraph.from_adjacency(graph, coords)
+        if not astar_admissible(compiled):
+            raise SystemExit("GeoJSON-style weights must keep astar admissible")
+        if not compiled.neighbors:
+            continue
+        weights = array('d', compiled.weights)
+        for _ in range(max(1, len(compiled) // 10)):
+            u = rng.randrange(len(compiled))
+            if compiled.offsets[u] == compiled.offsets[u + 1]:
+                continue
+            v = compiled.neighbors[rng.randrange(compiled.offsets[u], compiled.offsets[u + 1])]
+            for k in compiled.pair_slots(u, v):
+                weights[k] = compiled.weights[k] * 0.1
+        shortened = compiled.with_weights(weights)
+        if weights != compiled.weights and astar_admissible(shortened):
+            raise SystemExit("astar_admissible missed an edge shorter than its straight line")
+        names = list(graph)
+        for _ in range(20):
+            source, destination = rng.choice(names), rng.choice(names)
+            queries += 1
+            if astar(shortened, source, destination)[1] != dijkstra(shortened, source, destination)[1]:
+                suboptimal += 1
+
+    map_data = build_map_data(generate_map(2500, 50, seed=args.seed), "benchmark")
+    bundle = MapBundle(map_data)
+    graph = bundle.graph
+    u = next(u for u in range(len(graph)) if graph.offsets[u] < graph.offsets[u + 1])
+    pair = tuple(sorted((graph.names[u], graph.names[graph.neighbors[graph.offsets[u]]])))
+    for state, exact in ((('factor', 0.1), False), (('factor', 2.0), True), (('closed', None), True)):
+        if bundle.with_overlay({pair: state})[0].astar_exact != exact:
+            raise SystemExit(f"bundle astar_exact wrong after {state}")
+    print(f"shortened edges made {suboptimal} of {queries} astar routes longer than dijkstra's; "
+          f"astar_admissible caught every shortened graph")
+
+    data = generate_map(args.vertices, args.buildings, seed=args.seed)
+    graph, all_coords, building_names = build_graph_from_geojson(data)
+    compiled = CompiledGraph.from_adjacency(graph, all_coords)
+    names = sorted(building_names)
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.queries)]
+    modes = (("dijkstra", dijkstra), ("astar", astar), ("bidirectional", bidirectional_dijkstra))
+    for label, search in modes:
+        settled = 0
+        start = time.perf_counter()
+        for source, destination in pairs:
+            stats = {}
+            search(compiled, source, destination, stats=stats)
+            settled += stats['settled']
+        elapsed = time.perf_counter() - start
+        print(f"{label}: {settled / len(pairs):.0f} settled nodes/query, "
+              f"{elapsed / len(pairs) * 1000:.2f} ms/query")
+
+
+def bench_startup(args) -> None:
+    for size in args.sizes:
+        data = generate_map(size, max(1, size // 50), seed=args.seed)
+        start = time.perf_counter()
+        map_data = build_map_data(data, "benchmark")
+        elapsed = time.perf_counter() - start
+        print(f"{size:>8} vertices: {len(map_data.graph)} nodes, "
+              f"{len(map_data.edge_geometries)} geometries, startup build {elapsed:.3f}s")
+
+
+def random_grid_graph(n_edges: int, rng: random.Random) -> CompiledGraph:
+    """Square grid with about n_edges undirected edges and random weights."""
+    side = max(2, int((n_edges / 2) ** 0.5))
+    graph = {f"g{i}": [] for i in range(side * side)}
+    for i in range(side):
+        for j in range(side):
+            u = i * side + j
+            for v in ((u + 1) if j + 1 < side else None, (u + side) if i + 1 < side else None):
+                if v is not None:
+                    w = rng.uniform(1.0, 100.0)
+                    graph[f"g{u}"].append((f"g{v}", w))
+                    graph[f"g{v}"].append((f"g{u}", w))
+    return CompiledGraph.from_adjacency(graph)
+
+
+def legacy_prune_mst(mst_edges, building_names):
+    """The original prune_mst: one pass over all nodes per peeled layer, then a
+    scan of mst_edges for every kept edge's weight."""
+    adj = {}
+    for u, v, w in mst_edges:
+        if u not in adj: adj[u] = []
+        if v not in adj: adj[v] = []
+        adj[u].append(v)
+        adj[v].append(u)
+
+    changed = True
+    while changed:
+        changed = False
+        nodes_to_remove = []
+        for node in list(adj.keys()):
+            if len(adj[node]) == 1 and node not in building_names:
+                nodes_to_remove.append(node)
+        if nodes_to_remove:
+            changed = True
+            for node in nodes_to_remove:
+                neighbor = adj[node][0]
+                adj[neighbor].remove(node)
+                del adj[node]
+
+    pruned = []
+    seen = set()
+    for u in adj:
+        for v in adj[u]:
+            edge_key = tuple(sorted((u, v)))
+            if edge_key not in seen:
+                weight = 0
+                for ou, ov, ow in mst_edges:
+                    if (ou == u and ov == v) or (ou == v and ov == u):
+                        weight = ow
+                        break
+                pruned.append((u, v, weight))
+                seen.add(edge_key)
+    return pruned
+
+
+def random_tree_edges(n: int, rng: random.Random):
+    """Shuffled edges of a random tree on n named nodes, with a few parallel edges."""
+    names = [f"node {i}" for i in rng.sample(range(n), n)]
+    edges = []
+    for i in range(1, n):
+        u, v = names[i], names[rng.randrange(i)]
+        edges.append((u, v, round(rng.uniform(1, 100), 2)))
+        if rng.random() < 0.05:
+            edges.append((v, u, round(rng.uniform(1, 100), 2)))
+    rng.shuffle(edges)
+    return names, edges
+
+
+def check_prune_mst(args, rng: random.Random) -> None:
+    """prune_mst must return exactly what the original quadratic version did."""
+    for _ in range(args.trees):
+        names, edges = random_tree_edges(rng.randint(2, 60), rng)
+        # at least one building, or the original crashes on the last two nodes
+        buildings = set(rng.sample(names, rng.randint(1, max(1, len(names) // 4))))
+        if prune_mst(edges, buildings) != legacy_prune_mst(edges, buildings):
+            raise SystemExit(f"prune_mst disagrees with the original on {edges} / {buildings}")
+    print(f"prune_mst matches the original on {args.trees} random trees")
+
+    with open(args.geojson, encoding="utf-8") as f:
+        map_data = build_map_data(json.load(f), "benchmark")
+    graph, buildings = map_data.graph, map_data.building_names
+    for label, algorithm in (("kruskal", kruskal), ("prim", prim)):
+        tree = []
+        algorithm(graph, buildings, tree_edges=tree)
+        edges = [(graph.names[u], graph.names[v], w) for u, v, w in tree]
+        start = time.perf_counter()
+        pruned = prune_mst(edges, buildings)
+        new_time = time.perf_counter() - start
+        start = time.perf_counter()
+        legacy = legacy_prune_mst(edges, buildings)
+        legacy_time = time.perf_counter() - start
+        if pruned != legacy:
+            raise SystemExit(f"prune_mst disagrees with the original on the {label} tree of {args.geojson}")
+        print(f"{args.geojson} {label} tree: {len(pruned)}/{len(edges)} edges kept, identical; "
+              f"prune_mst {new_time * 1000:.1f} ms, original {legacy_time * 1000:.1f} ms")
+
+
+def bench_mst(args) -> None:
+    rng = random.Random(args.seed)
+    check_prune_mst(args, rng)
+    for n_edges in args.edges:
+        graph = random_grid_graph(n_edges, rng)
+        # every other node is a building so pruning keeps most of the tree
+        building_names = set(graph.names[::2])
+        results = []
+        for label, algorithm in (("kruskal", kruskal), ("prim", prim)):
+            start = time.perf_counter()
+            edges, total = algorithm(graph, building_names)
+            elapsed = time.perf_counter() - start
+            results.append(total)
+            print(f"{len(graph.neighbors) // 2:>8} edges  {label:<8} {elapsed:.3f}s  "
+                  f"({len(edges)} pruned edges, weight {total:.1f})")
+        if abs(results[0] - results[1]) > 1e-6 * results[0]:
+            raise SystemExit("kruskal and prim disagree on the tree weight")
+
+
+def bench_heaps(args) -> None:
+    # every heap must give the same paths as the lazy binary heap
+    rng = random.Random(args.seed)
+    for _ in range(args.graphs):
+        graph, coords = random_geometric_graph(rng.randint(3, 25), rng)
+        compiled = CompiledGraph.from_adjacency(graph, coords)
+        names = list(graph)
+        for _ in range(20):
+            source, destination = rng.choice(names), rng.choice(names)
+            expected = dijkstra(compiled, source, destination)
+            for heap in HEAP_KINDS:
+                result = dijkstra(compiled, source, destination, heap=heap)
+                if result != expected:
+                    raise SystemExit(f"{heap} {source}->{destination}: {result} != {expected}")
+    print(f"all heaps agree with the binary heap on {args.graphs} random graphs")
+
+    for size in args.sizes:
+        data = generate_map(size, max(2, size // 500), density=args.density, jitter=args.jitter, seed=args.seed)
+        graph, all_coords, building_names = build_graph_from_geojson(data)
+        compiled = CompiledGraph.from_adjacency(graph, all_coords)
+        names = sorted(building_names)
+        pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.queries)]
+        print(f"{len(compiled)} nodes, {len(compiled.neighbors) // 2} edges")
+        for heap in HEAP_KINDS:
+            totals = {'pushes': 0, 'pops': 0, 'decreases': 0}
+            start = time.perf_counter()
+            for source, destination in pairs:
+                stats = {}
+                dijkstra(compiled, source, destination, stats=stats, heap=heap)
+                for key in totals:
+                    totals[key] += stats.get(key, 0)
+            elapsed = time.perf_counter() - start
+            counts = "  ".join(f"{key} {value / len(pairs):>9.0f}" for key, value in totals.items())
+            print(f"  {heap:<9} {elapsed / len(pairs) * 1000:8.1f} ms/query  {counts}")
+
+
+def bench_nearest(args) -> None:
+    rng = random.Random(args.seed)
+    side = 0.2  # degrees, a city-sized area
+    lons = [BASE_LON + rng.random() * side for _ in range(args.points)]
+    lats = [BASE_LAT + rng.random() * side for _ in range(args.points)]
+    start = time.perf_counter()
+    tree = KDTree(range(args.points), lons, lats)
+    print(f"built KDTree over {len(tree)} points in {time.perf_counter() - start:.2f}s")
+
+    queries = [(BASE_LON + rng.random() * side, BASE_LAT + rng.random() * side) for _ in range(args.queries)]
+    # brute force on a sample, using the tree's own projection
+    for lon, lat in queries[:args.check]:
+        qx, qy = lon * tree.x_scale, lat * tree.y_scale
+        best = min(range(args.points), key=lambda i: ((lons[i] * tree.x_scale - qx) ** 2
+                                                      + (lats[i] * tree.y_scale - qy) ** 2, i))
+        if tree.nearest(lon, lat)[0][1] != best:
+            raise SystemExit(f"nearest({lon}, {lat}) disagrees with a linear scan")
+    print(f"nearest agrees with a linear scan on {args.check} queries")
+
+    for label, query in (("nearest", lambda lon, lat: tree.nearest(lon, lat)),
+                         ("nearest k=10", lambda lon, lat: tree.nearest(lon, lat, 10)),
+                         (f"within {args.radius:g} m", lambda lon, lat: tree.within(lon, lat, args.radius))):
+        times = []
+        for lon, lat in queries:
+            start = time.perf_counter()
+            query(lon, lat)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        p50 = times[len(times) // 2] * 1e6
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))] * 1e6
+        print(f"{label:<14} p50 {p50:.0f} us  p99 {p99:.0f} us")
+
+
+def bench_isochrone(args) -> None:
+    data = generate_map(args.vertices, 10, density=0.1, seed=args.seed)
+    edge_geometries = EdgeGeometries()
+    graph, all_coords, building_names = build_graph_from_geojson(data, edge_geometries)
+    compiled = CompiledGraph.from_adjacency(graph, all_coords)
+    source = compiled.names[len(compiled) // 2]
+    start = time.perf_counter()
+    full = single_source_distances(compiled, source)
+    print(f"{len(compiled)} nodes; full dijkstra {time.perf_counter() - start:.3f}s")
+    for meters in args.budgets:
+        stats = {}
+        start = time.perf_counter()
+        result = isochrone(compiled, all_coords, edge_geometries, source, meters, stats)
+        elapsed = time.perf_counter() - start
+        if result['reached'] != {n: d for n, d in full.items() if d <= meters}:
+            raise SystemExit(f"isochrone of {meters} m disagrees with the full search")
+        print(f"{meters:>6g} m: {stats['settled']:>8} nodes, {len(result['segments']):>8} segments, "
+              f"{len(result['hull']):>4} hull points, {elapsed:.3f}s")
+
+
+def bench_precompute(args) -> None:
+    """Live route latency while the route table builds in a thread vs a child process."""
+    map_data = build_map_data(generate_map(args.vertices, args.buildings, density=0.1, seed=args.seed), "benchmark")
+    graph = map_data.graph
+    names = sorted(map_data.building_names)
+    rng = random.Random(args.seed)
+    pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.requests)]
+
+    def requests():
+        # a request thread: wait on the "socket", then run one live search
+        times = []
+        for source, destination in pairs:
+            time.sleep(args.think)
+            start = time.perf_counter()
+            dijkstra(graph, source, destination)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        return times[len(times) // 2] * 1000, times[min(len(times) - 1, int(len(times) * 0.99))] * 1000
+
+    p50, p99 = requests()
+    print(f"{len(graph)} nodes, {len(names)} buildings, {len(pairs)} requests")
+    print(f"{'no build':<16} request p50 {p50:7.2f} ms  p99 {p99:7.2f} ms")
+    for label, use_process in (("thread build", False), ("process build", True)):
+        table = RouteTable(graph, names)
+        start = time.perf_counter()
+        builder = threading.Thread(target=table.build, args=(use_process,), daemon=True)
+        builder.start()
+        p50, p99 = requests()
+        during = table.ready
+        builder.join()
+        print(f"{label:<16} request p50 {p50:7.2f} ms  p99 {p99:7.2f} ms  "
+              f"(build {time.perf_counter() - start:.1f}s, {'finished' if during else 'still running'} after the requests)")
+
+
+class DictRecordHashTable(HashTable):
+    """The table before BuildingRecord: a fresh dict per entry, coordinates stored as given."""
+    def add(self, building_name, coordinates, extra_info):
+        index = self.hash_function(building_name)
+        for record in self.table[index]:
+            if record['building_name'] == building_name:
+                return f"Building {building_name} already exists."
+        self.table[index].append({
+            'building_name': building_name,
+            'coordinates': coordinates,
+            'details': extra_info
+        })
+        self.count += 1
+        if self.max_load_factor is not None and self.count > self.size * self.max_load_factor:
+            self.resize(self.size * 2)
+
+    def resize(self, new_size):
+        old_table = self.table
+        self.size = new_size
+        self.table = [[] for _ in range(new_size)]
+        for chain in old_table:
+            for record in chain:
+                self.table[self.hash_function(record['building_name'])].append(record)
+
+    def get(self, building_name):
+        index = self.hash_function(building_name)
+        for record in self.table[index]:
+            if record['building_name'] == building_name:
+                return record
+        return None
+
+
+def legacy_get_embedded_data(building_name):
+    """The original lookup: six fresh category dicts and a list per call, then an 'or' chain."""
+    categories = [{name: dict(info) for name, info in category.items()}
+                  for category in (hashtable.DEAN_BUILDINGS, hashtable.RESEARCH_CENTERS, hashtable.LIBRARIES,
+                                   hashtable.SPORTS_FACILITIES, hashtable.UNAVAILABLE_FACILITIES,
+                                   hashtable.STUDENT_BUILDINGS)]
+    if building_name in list(hashtable.EXCLUDED_INTERSECTIONS):
+        return None
+    found = None
+    for category in categories:
+        found = found or category.get(building_name)
+    return found or {"Details": "Other or Unknown Building"}
+
+
+class LegacyHashTable(DictRecordHashTable):
+    """The original table: dict entries, fixed size and a sum-of-character-codes hash."""
+    def __init__(self, size):
+        super().__init__(size, max_load_factor=None)
+
+    def hash_function(self, key):
+        return sum(ord(char) for char in key) % self.size
+
+
+def building_like_names(n: int, rng: random.Random):
+    """Numbered variants of a few stems, like "Rotunda 1" / "Rotunda 2"."""
+    stems = ["Rotunda", "Admin Building", "College of Science Annex", "Dorm", "Gym",
+             "Lecture Hall", "Research Center for Tropical Agriculture", "Canteen"]
+    return [f"{rng.choice(stems)} {i}" for i in range(n)]
+
+
+def bench_hashtable(args) -> None:
+    rng = random.Random(args.seed)
+    names = building_like_names(args.records, rng)
+    probes = rng.sample(names, min(args.lookups, len(names)))
+    tables = (("legacy (size 50)", lambda: LegacyHashTable(50)),
+              ("chaining + fnv1a", lambda: HashTable(50)),
+              ("open addressing", lambda: OpenAddressingHashTable(50)))
+    for label, make in tables:
+        table = make()
+        start = time.perf_counter()
+        for name in names:
+            table.add(name, [BASE_LON, BASE_LAT], {})
+        add_time = time.perf_counter() - start
+        start = time.perf_counter()
+        for name in probes:
+            if table.get(name) is None:
+                raise SystemExit(f"{label}: lost {name}")
+        get_time = time.perf_counter() - start
+        lengths = [n for n in table.chain_lengths() if n]
+        print(f"{label:<18} size {table.size:>7}  longest chain/probe {max(lengths):>5}  "
+              f"mean {sum(lengths) / len(lengths):7.2f}  add {add_time / len(names) * 1e6:8.2f} us  "
+              f"get {get_time / len(probes) * 1e6:8.2f} us")
+
+
+def bench_records(args) -> None:
+    """Load time and memory per record when filling the building hash table."""
+    rng = random.Random(args.seed)
+    known = ["Library", "CSM Building", "Training Gym", "EBL Dorm", "Aquatics Center", "CARIM Building"]
+    # a few real names, the rest numbered copies that fall back to the default details
+    names = [known[i] if i < len(known) else f"{rng.choice(known)} {i}" for i in range(args.records)]
+    coords = [[BASE_LON + rng.random() * 0.01, BASE_LAT + rng.random() * 0.01] for _ in names]
+
+    def load(table_class, details_of):
+        geojson_data = {"type": "FeatureCollection", "features": [
+            {"type": "Feature", "properties": {"Name": name},
+             "geometry": {"type": "Point", "coordinates": list(c)}}
+            for name, c in zip(names, coords)]}
+        start = time.perf_counter()
+        table = table_class(50)
+        for building in building_data_from_geojson(geojson_data):
+            extra_info = details_of(building['Name'])
+            if extra_info:
+                table.add(building['Name'], building['Coordinates'], extra_info)
+        return table, time.perf_counter() - start
+
+    variants = (("dict records (before)", DictRecordHashTable, legacy_get_embedded_data),
+                ("BuildingRecord", HashTable, get_embedded_data))
+    for label, table_class, details_of in variants:
+        table, elapsed = load(table_class, details_of)
+        for name in names[:1000]:
+            if table.get(name)['details'] != get_embedded_data(name):
+                raise SystemExit(f"{label}: wrong details for {name}")
+        table = None
+        tracemalloc.start()
+        before = tracemalloc.get_traced_memory()[0]
+        # the parsed GeoJSON is garbage once load() returns, so only what the table keeps is counted
+        table, _ = load(table_class, details_of)
+        after = tracemalloc.get_traced_memory()[0]
+        tracemalloc.stop()
+        print(f"{label:<22} {len(table)} records loaded in {elapsed:.3f}s, "
+              f"{(after - before) / len(table):.0f} bytes per record (table included)")
+
+
+def write_large_geojson(path: str, target_bytes: int, seed: int = 0) -> None:
+    """FeatureCollection of random-walk paths over a fixed street grid, written incrementally.
+
+    Features carry OSM-style tags, like real regional exports. The grid
+    bounds the number of distinct vertices, so the file can grow without
+    the graph growing with it.
+    """
+    rng = random.Random(seed)
+    side = 300
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('{"type": "FeatureCollection", "name": "synthetic", "features": [\n')
+        for k in range(2000):
+            point = {"type": "Feature", "properties": {"Name": f"Building {k}"},
+                     "geometry": {"type": "Point", "coordinates": [BASE_LON + rng.randrange(side) * SPACING,
+                                                                   BASE_LAT + rng.randrange(side) * SPACING]}}
+            f.write(json.dumps(point) + ",\n")
+        k = 0
+        while f.tell() < target_bytes:
+            i, j = rng.randrange(side), rng.randrange(side)
+            coords = []
+            for _ in range(rng.randint(5, 20)):
+                coords.append([BASE_LON + i * SPACING, BASE_LAT + j * SPACING])
+                if rng.random() < 0.5:
+                    i = min(side - 1, max(0, i + rng.choice((-1, 1))))
+                else:
+                    j = min(side - 1, max(0, j + rng.choice((-1, 1))))
+            properties = {"Name": "Campus Pathways", "osm_id": 100000000 + k, "highway": "footway",
+                          "surface": rng.choice(["paved", "gravel", "concrete", "dirt"]),
+                          "lit": rng.choice(["yes", "no"]), "width": rng.randint(1, 6),
+                          "source": "survey", "note": "synthetic benchmark segment " * 4}
+            f.write(json.dumps({"type": "Feature", "properties": properties,
+                                "geometry": {"type": "LineString", "coordinates": coords}}) + ",\n")
+            k += 1
+        f.write('{"type": "Feature", "properties": {}, "geometry": {"type": "Point", "coordinates": [0, 0]}}\n]}\n')
+
+
+def _load_in_child(method: str, path: str):
+    """Runs in a fresh process so ru_maxrss is the peak of this load alone."""
+    start = time.perf_counter()
+    if method == "json.load":
+        with open(path) as f:
+            features = json.load(f)["features"]
+        count = sum(1 for _ in features)
+    elif method == "iter_features":
+        count = sum(1 for _ in iter_features(path))
+    elif method == "json.load + build":
+        with open(path) as f:
+            count = len(build_map_data(json.load(f), "benchmark").graph)
+    else:
+        count = len(build_map_data_from_features(iter_features(path), "benchmark").graph)
+    elapsed = time.perf_counter() - start
+    return count, elapsed, resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def bench_stream(args) -> None:
+    path = args.path or os.path.join(tempfile.gettempdir(), f"synthetic_{args.mb}mb.geojson")
+    if not os.path.exists(path) or os.path.getsize(path) < args.mb * 1_000_000:
+        write_large_geojson(path, args.mb * 1_000_000, args.seed)
+    print(f"{path}: {os.path.getsize(path) / 1e6:.0f} MB")
+    methods = (["json.load", "iter_features"] if args.mode == "read"
+               else ["json.load + build", "iter_features + build"])
+    for method in methods:
+        with ProcessPoolExecutor(max_workers=1, mp_context=get_context("spawn")) as pool:
+            count, elapsed, peak_mb = pool.submit(_load_in_child, method, path).result()
+        label = "features" if args.mode == "read" else "graph nodes"
+        print(f"{method:<22} {elapsed:7.2f}s  peak RSS {peak_mb:7.0f} MB  ({count} {label})")
+
+
+def typo(name: str, rng: random.Random) -> str:
+    """Drop, double or swap one character."""
+    i = rng.randrange(len(name) - 1)
+    edit = rng.randrange(3)
+    if edit == 0:
+        return name[:i] + name[i + 1:]
+    if edit == 1:
+        return name[:i] + name[i] + name[i:]
+    return name[:i] + name[i + 1] + name[i] + name[i + 2:]
+
+
+def made_up_names(n: int, rng: random.Random):
+    """n distinct names built from invented words plus a few common suffixes."""
+    syllables = ["ka", "li", "mu", "dan", "ro", "ta", "bi", "sen", "ga", "lo",
+                 "ne", "pan", "ri", "to", "ham", "ber", "cor", "vel", "mis", "ul"]
+    vocab = sorted({"".join(rng.choice(syllables) for _ in range(rng.randint(2, 4))) for _ in range(6000)})
+    suffixes = ["Hall", "Building", "Center", "Annex", "Dorm", "Gym", "Library", "College", "Office"]
+    names = set()
+    while len(names) < n:
+        name = " ".join(rng.choice(vocab).title() for _ in range(rng.randint(1, 3)))
+        if rng.random() < 0.6:
+            name += " " + rng.choice(suffixes)
+        if rng.random() < 0.2:
+            name += f" {rng.randint(1, 20)}"
+        names.add(name)
+    return sorted(names)
+
+
+def bench_typeahead(args) -> None:
+    rng = random.Random(args.seed)
+    names = made_up_names(args.names, rng)
+    if args.no_numpy:
+        search_module.np = None  # the index picks its posting arrays when built
+    start = time.perf_counter()
+    index = BuildingSearchIndex(names)
+    print(f"built index over {len(index)} names in {time.perf_counter() - start:.2f}s")
+
+    queries = {
+        "prefix": [rng.choice(names)[:rng.randint(1, 6)] for _ in range(args.queries)],
+        "word": [rng.choice(names).split()[-1][:rng.randint(2, 5)] for _ in range(args.queries)],
+        "fuzzy": [typo(rng.choice(names), rng) for _ in range(args.queries)],
+    }
+    for label, batch in queries.items():
+        times = []
+        for q in batch:
+            start = time.perf_counter()
+            index.search(q, limit=10)
+            times.append(time.perf_counter() - start)
+        times.sort()
+        p50 = times[len(times) // 2] * 1000
+        p99 = times[min(len(times) - 1, int(len(times) * 0.99))] * 1000
+        print(f"{label:<7} p50 {p50:.3f} ms  p99 {p99:.3f} ms")
+
+
+def best_of(repeat: int, fn) -> float:
+    """Fastest of repeat runs of fn, in seconds."""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def bench_suite(args) -> None:
+    results = []
+    def record(benchmark, size, seconds, per=1):
+        results.append({"benchmark": benchmark, "size": size, "seconds": seconds / per})
+        print(f"{size:>8} {benchmark:<16} {seconds / per * 1000:10.4f} ms")
+
+    for size in args.sizes:
+        rng = random.Random(args.seed)
+        data = generate_map(size, max(2, size // 50), density=args.density,
+                            segment_length=args.segment_length, multiline=args.multiline, seed=args.seed)
+        record("startup", size, best_of(args.repeat, lambda: build_map_data(data, "benchmark")))
+        map_data = build_map_data(data, "benchmark")
+        graph, building_names = map_data.graph, map_data.building_names
+
+        names = sorted(building_names)
+        pairs = [(rng.choice(names), rng.choice(names)) for _ in range(args.queries)]
+        def run_queries():
+            for source, destination in pairs:
+                dijkstra(graph, source, destination)
+        record("dijkstra", size, best_of(args.repeat, run_queries), len(pairs))
+        record("kruskal", size, best_of(args.repeat, lambda: kruskal(graph, building_names)))
+        record("prim", size, best_of(args.repeat, lambda: prim(graph, building_names)))
+
+        tree_edges = []
+        kruskal(graph, building_names, tree_edges=tree_edges)
+        building_ids = {graph.ids[b] for b in building_names}
+        record("prune_mst", size, best_of(args.repeat, lambda: prune_mst(tree_edges, building_ids)))
+
+        # one record per graph node, so the table work grows with the map like the rest
+        keys = building_like_names(len(graph), rng)
+        probes = [rng.choice(keys) for _ in range(args.queries * 20)]
+        table = HashTable(50)
+        def fill():
+            nonlocal table
+            table = HashTable(50)
+            for key in keys:
+                table.add(key, (BASE_LON, BASE_LAT), {})
+        record("hashtable_add", size, best_of(args.repeat, fill), len(keys))
+        def lookups():
+            for key in probes:
+                table.get(key)
+        record("hashtable_get", size, best_of(args.repeat, lookups), len(probes))
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+            "repeat": args.repeat,
+            "queries": args.queries,
+            "density": args.density,
+            "seed": args.seed,
+        },
+        "results": results,
+    }
+    with open(args.out, "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+    print(f"wrote {len(results)} results to {args.out}")
+
+
+def bench_compare(args) -> None:
+    def load(path):
+        with open(path, encoding="utf-8") as f:
+            return {(r["benchmark"], r["size"]): r["seconds"] for r in json.load(f)["results"]}
+    old, new = load(args.old), load(args.new)
+    regressions = 0
+    for key in sorted(old.keys() & new.keys()):
+        ratio = new[key] / old[key] if old[key] > 0 else float('inf')
+        flag = ""
+        if ratio > 1 + args.threshold:
+            flag = "  REGRESSION"
+            regressions += 1
+        elif ratio < 1 - args.threshold:
+            flag = "  faster"
+        benchmark, size = key
+        print(f"{benchmark:<16} {size:>8}  {old[key] * 1000:10.4f} ms -> {new[key] * 1000:10.4f} ms  "
+              f"x{ratio:.2f}{flag}")
+    for key in sorted(old.keys() ^ new.keys()):
+        print(f"{key[0]:<16} {key[1]:>8}  only in {args.old if key in old else args.new}")
+    if regressions:
+        print(f"{regressions} regression(s) above {args.threshold:.0%}")
+        sys.exit(1)
+    print(f"no regressions above {args.threshold:.0%}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+
+    build = sub.add_parser("build", help="graph construction on a synthetic map")
+    build.add_argument("--vertices", type=int, default=50000)
+    build.add_argument("--buildings", type=int, default=5000)
+    build.add_argument("--seed", type=int, default=0)
+    build.add_argument("--linear-sample", type=int, default=2000)
+    build.add_argument("--check-vertices", type=int, default=2500,
+                       help="size of the mapgen map checked against the original builder")
+    build.add_argument("--geojson", default="data/campus_map.geojson")
+    build.set_defaults(func=bench_build)
+
+    compiled = sub.add_parser("compiled", help="dict vs compiled graph memory and dijkstra latency")
+    compiled.add_argument("--vertices", type=int, default=50000)
+    compiled.add_argument("--buildings", type=int, default=500)
+    compiled.add_argument("--queries", type=int, default=50)
+    compiled.add_argument("--seed", type=int, default=0)
+    compiled.set_defaults(func=bench_compiled)
+
+    haversine = sub.add_parser("haversine", help="batched distance accuracy and throughput")
+    haversine.add_argument("--segments", type=int, default=200000)
+    haversine.add_argument("--seed", type=int, default=0)
+    haversine.set_defaults(func=bench_haversine)
+
+    search = sub.add_parser("search", help="dijkstra vs astar vs bidirectional")
+    search.add_argument("--vertices", type=int, default=50000)
+    search.add_argument("--buildings", type=int, default=500)
+    search.add_argument("--queries", type=int, default=50)
+    search.add_argument("--graphs", type=int, default=200)
+    search.add_argument("--seed", type=int, default=0)
+    search.set_defaults(func=bench_search)
+
+    startup = sub.add_parser("startup", help="full map build (graph + geometries) by map size")
+    startup.add_argument("--sizes", type=int, nargs="+", default=[1000, 5000, 20000, 50000, 100000])
+    startup.add_argument("--seed", type=int, default=0)
+    startup.set_defaults(func=bench_startup)
+
+    mst = sub.add_parser("mst", help="kruskal vs prim on random grid graphs")
+    mst.add_argument("--edges", type=int, nargs="+", default=[10000, 50000, 100000, 500000])
+    mst.add_argument("--trees", type=int, default=2000, help="random trees checked against the original prune_mst")
+    mst.add_argument("--geojson", default="data/campus_map.geojson")
+    mst.add_argument("--seed", type=int, default=0)
+    mst.set_defaults(func=bench_mst)
+
+    heaps = sub.add_parser("heaps", help="dijkstra on the binary, indexed d-ary and radix heaps")
+    heaps.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 250000])
+    heaps.add_argument("--queries", type=int, default=20)
+    heaps.add_argument("--density", type=float, default=0.2)
+    heaps.add_argument("--jitter", type=float, default=0.3)
+    heaps.add_argument("--graphs", type=int, default=100)
+    heaps.add_argument("--seed", type=int, default=0)
+    heaps.set_defaults(func=bench_heaps)
+
+    nearest = sub.add_parser("nearest", help="KDTree nearest and radius query latency")
+    nearest.add_argument("--points", type=int, default=1000000)
+    nearest.add_argument("--queries", type=int, default=5000)
+    nearest.add_argument("--check", type=int, default=5, help="queries checked against a linear scan")
+    nearest.add_argument("--radius", type=float, default=50.0)
+    nearest.add_argument("--seed", type=int, default=0)
+    nearest.set_defaults(func=bench_nearest)
+
+    iso = sub.add_parser("isochrone", help="bounded search + clipped segments vs a full dijkstra")
+    iso.add_argument("--vertices", type=int, default=250000)
+    iso.add_argument("--budgets", type=float, nargs="+", default=[40, 80, 160])
+    iso.add_argument("--seed", type=int, default=0)
+    iso.set_defaults(func=bench_isochrone)
+
+    pre = sub.add_parser("precompute", help="live route latency during a route table build")
+    pre.add_argument("--vertices", type=int, default=20000)
+    pre.add_argument("--buildings", type=int, default=400)
+    pre.add_argument("--requests", type=int, default=300)
+    pre.add_argument("--think", type=float, default=0.005, help="seconds each request waits before searching")
+    pre.add_argument("--seed", type=int, default=0)
+    pre.set_defaults(func=bench_precompute)
+
+    hashtable = sub.add_parser("hashtable", help="legacy vs resizable vs open-addressing hash table")
+    hashtable.add_argument("--records", type=int, default=100000)
+    hashtable.add_argument("--lookups", type=int, default=2000)
+    hashtable.add_argument("--seed", type=int, default=0)
+    hashtable.set_defaults(func=bench_hashtable)
+
+    records = sub.add_parser("records", help="building hash table load time and memory per record")
+    records.add_argument("--records", type=int, default=100000)
+    records.add_argument("--seed", type=int, default=0)
+    records.set_defaults(func=bench_records)
+
+    stream = sub.add_parser("stream", help="peak memory of json.load vs streaming GeoJSON reads")
+    stream.add_argument("--mb", type=int, default=500, help="size of the synthetic file")
+    stream.add_argument("--path", default=None, help="reuse or write the synthetic file here")
+    stream.add_argument("--mode", choices=["read", "build"], default="read",
+                        help="read the features only, or run the full map build")
+    stream.add_argument("--seed", type=int, default=0)
+    stream.set_defaults(func=bench_stream)
+
+    typeahead = sub.add_parser("typeahead", help="building search index latency")
+    typeahead.add_argument("--names", type=int, default=50000)
+    typeahead.add_argument("--queries", type=int, default=2000)
+    typeahead.add_argument("--seed", type=int, default=0)
+    typeahead.add_argument("--no-numpy", action="store_true", help="time the plain Python fallback")
+    typeahead.set_defaults(func=bench_typeahead)
+
+    suite = sub.add_parser("suite", help="startup, search, MST and hash table timings across sizes, as JSON")
+    suite.add_argument("--sizes", type=int, nargs="+", default=[1000, 10000, 50000])
+    suite.add_argument("--repeat", type=int, default=3, help="runs per timing; the fastest is kept")
+    suite.add_argument("--queries", type=int, default=50)
+    suite.add_argument("--density", type=float, default=0.1)
+    suite.add_argument("--segment-length", type=int, default=0)
+    suite.add_argument("--multiline", type=float, default=0.0)
+    suite.add_argument("--seed", type=int, default=0)
+    suite.add_argument("--out", default="benchmark_results.json")
+    suite.set_defaults(func=bench_suite)
+
+    compare = sub.add_parser("compare", help="compare two suite result files and flag regressions")
+    compare.add_argument("old")
+    compare.add_argument("new")
+    compare.add_argument("--threshold", type=float, default=0.10,
+                         help="relative slowdown that counts as a regression")
+    compare.set_defaults(func=bench_compare)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
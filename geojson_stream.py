@@ -0,0 +1,116 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""Incremental GeoJSON reader.
+
+json.load keeps the whole document tree in memory, which for a large
+regional map is several times the file size. iter_features() reads the file
+in chunks and decodes one feature at a time, so only the current feature
+and one buffer of text are held at once.
+"""
+import hashlib
+import json
+from typing import Iterator
+
+CHUNK_SIZE = 1 << 20  # characters read per refill
+
+_decoder = json.JSONDecoder()
+_WHITESPACE = ' \t\n\r'
+
+
+class _Reader:
+    """Text buffer over a file that refills on demand and forgets consumed text."""
+    def __init__(self, f, chunk_size: int):
+        self.f = f
+        self.chunk_size = chunk_size
+        self.buf = ''
+        self.pos = 0
+        self.eof = False
+
+    def fill(self) -> bool:
+        """Read one more chunk; False at end of file."""
+        if self.eof:
+            return False
+        chunk = self.f.read(self.chunk_size)
+        if not chunk:
+            self.eof = True
+            return False
+        self.buf = self.buf[self.pos:] + chunk
+        self.pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Next non-whitespace character without consuming it, '' at end of file."""
+        while True:
+            while self.pos < len(self.buf) and self.buf[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buf):
+                return self.buf[self.pos]
+            if not self.fill():
+                return ''
+
+    def expect(self, char: str) -> None:
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"expected {char!r} at offset {self.pos}, found {found!r}")
+        self.pos += 1
+
+    def value(self):
+        """Decode the next JSON value, reading more of the file until it is complete."""
+        self.peek()
+        reads = 1
+        while True:
+            try:
+                value, end = _decoder.raw_decode(self.buf, self.pos)
+            except json.JSONDecodeError:
+                if self.eof:
+                    raise
+                # grow the reads so one huge value is not re-parsed once per chunk
+                for _ in range(reads):
+                    if not self.fill():
+                        break
+                reads *= 2
+                continue
+            # a number can stop early at the end of the buffer ("12" of "12.5")
+            if end == len(self.buf) and not self.eof and self.fill():
+                continue
+            self.pos = end
+            return value
+
+
+def iter_features(path, chunk_size: int = CHUNK_SIZE) -> Iterator[dict]:
+    """Yield the features of a GeoJSON FeatureCollection one at a time."""
+    with open(path, 'r', encoding='utf-8') as f:
+        reader = _Reader(f, chunk_size)
+        reader.expect('{')
+        while reader.peek() != '}':
+            key = reader.value()
+            reader.expect(':')
+            if key == 'features':
+                reader.expect('[')
+                while reader.peek() != ']':
+                    yield reader.value()
+                    if reader.peek() == ',':
+                        reader.pos += 1
+                reader.expect(']')
+            else:
+                reader.value()  # "type", "name", "crs" and other small members
+            if reader.peek() == ',':
+                reader.pos += 1
+            elif reader.peek() != '}':
+                raise ValueError(f"malformed GeoJSON at offset {reader.pos}")
+
+
+def file_hash(path, chunk_size: int = CHUNK_SIZE) -> str:
+    """SHA-256 of the file bytes, read in chunks."""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(chunk_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
@@ -13,37 +13,100 @@ Loads buildings from the GeoJSON map and stores them in a simple hash table
 with separate chaining to handle collisions. Each entry keeps at least three
 pieces of information: name, dean (placeholder), contact (placeholder), and
 map coordinates pulled from the GeoJSON.
+
+Keys are hashed with 64-bit FNV-1a and the table doubles whenever the load
+factor passes max_load_factor, so chains stay short as buildings are added.
+OpenAddressingHashTable offers the same interface with linear probing over
+parallel arrays instead of chains.
 """
-import json
+from array import array
+
+from geojson_stream import iter_features
+
+FNV_OFFSET = 0xcbf29ce484222325
+FNV_PRIME = 0x100000001b3
+MASK_64 = 0xffffffffffffffff
+
+def fnv1a(key):
+    """64-bit FNV-1a hash of the UTF-8 bytes of key."""
+    h = FNV_OFFSET
+    for byte in key.encode('utf-8'):
+        h = ((h ^ byte) * FNV_PRIME) & MASK_64
+    return h
+
+class BuildingRecord:
+    """One hash table entry. Read-only; coordinates are stored as a tuple.
+
+    record['building_name'] still works, so code written against the old
+    dict entries does not have to change.
+    """
+    __slots__ = ('building_name', 'coordinates', 'details')
+
+    def __init__(self, building_name, coordinates, details):
+        object.__setattr__(self, 'building_name', building_name)
+        object.__setattr__(self, 'coordinates', tuple(coordinates))
+        object.__setattr__(self, 'details', details)
+
+    def __setattr__(self, name, value):
+        raise AttributeError("BuildingRecord is read-only")
+
+    def __delattr__(self, name):
+        raise AttributeError("BuildingRecord is read-only")
+
+    def __getitem__(self, key):
+        if key not in self.__slots__:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __eq__(self, other):
+        if not isinstance(other, BuildingRecord):
+            return NotImplemented
+        return (self.building_name, self.coordinates, self.details) == \
+            (other.building_name, other.coordinates, other.details)
+
+    __hash__ = None  # details is a dict
+
+    def __repr__(self):
+        return f"BuildingRecord({self.building_name!r}, {self.coordinates!r}, {self.details!r})"
 
 class HashTable:
-    def __init__(self, size):
+    def __init__(self, size, max_load_factor=0.75):
         self.size = size
         self.table = [[] for _ in range(size)]  # Using lists to handle collisions (chaining)
+        self.count = 0
+        self.max_load_factor = max_load_factor  # None keeps the size fixed
 
     def hash_function(self, key):
         """Custom hash function to generate index based on the key (building name)."""
-        return sum(ord(char) for char in key) % self.size
+        return fnv1a(key) % self.size
 
     def add(self, building_name, coordinates, extra_info):
         """Add a building record to the hash table."""
         index = self.hash_function(building_name)
         # Check if the building already exists
         for record in self.table[index]:
-            if record['building_name'] == building_name:
+            if record.building_name == building_name:
                 return f"Building {building_name} already exists."
         # Add the new record
-        self.table[index].append({
-            'building_name': building_name,
-            'coordinates': coordinates,
-            'details': extra_info
-        })
+        self.table[index].append(BuildingRecord(building_name, coordinates, extra_info))
+        self.count += 1
+        if self.max_load_factor is not None and self.count > self.size * self.max_load_factor:
+            self.resize(self.size * 2)
+
+    def resize(self, new_size):
+        """Rehash every record into new_size buckets."""
+        old_table = self.table
+        self.size = new_size
+        self.table = [[] for _ in range(new_size)]
+        for chain in old_table:
+            for record in chain:
+                self.table[self.hash_function(record.building_name)].append(record)
 
     def get(self, building_name):
         """Retrieve a building record by name."""
         index = self.hash_function(building_name)
         for record in self.table[index]:
-            if record['building_name'] == building_name:
+            if record.building_name == building_name:
                 return record
         return None
 
@@ -51,11 +114,19 @@ class HashTable:
         """Delete a building record by name."""
         index = self.hash_function(building_name)
         for i, record in enumerate(self.table[index]):
-            if record['building_name'] == building_name:
+            if record.building_name == building_name:
                 del self.table[index][i]
+                self.count -= 1
                 return f"Building {building_name} deleted."
         return f"Building {building_name} not found."
 
+    def chain_lengths(self):
+        """Number of records in each bucket."""
+        return [len(chain) for chain in self.table]
+
+    def __len__(self):
+        return self.count
+
     def display_building(self, building_name):
         """Retrieve and display a building in formatted way."""
         record = self.get(building_name)
@@ -63,21 +134,120 @@ class HashTable:
             print(f"{building_name} not found.")
             return
         
-        print(f"Building name : {record['building_name']}")
-        print(f"Coordinates : {record['coordinates']}")
+        print(f"Building name : {record.building_name}")
+        print(f"Coordinates : {record.coordinates}")
         
-        for key, value in record['details'].items():
+        for key, value in record.details.items():
             print(f"{key} : {value}")
-        return record  # Still returns the dict if needed
+        return record  # Still returns the record if needed
+
+
+_DELETED = object()  # tombstone left by delete so probe sequences stay intact
+
+class OpenAddressingHashTable(HashTable):
+    """Same interface as HashTable, using linear probing over parallel arrays.
+
+    keys[i], hashes[i] and records[i] describe slot i; the capacity is a power
+    of two so the probe start is a bit mask of the full hash.
+    """
+    def __init__(self, size, max_load_factor=0.6):
+        capacity = 8
+        while capacity < size:
+            capacity *= 2
+        self.max_load_factor = max_load_factor
+        self._allocate(capacity)
+
+    def _allocate(self, capacity):
+        self.size = capacity
+        self.keys = [None] * capacity
+        self.hashes = array('Q', bytes(8 * capacity))
+        self.records = [None] * capacity
+        self.count = 0
+        self.used = 0  # live records plus tombstones
+
+    def hash_function(self, key):
+        return fnv1a(key) & (self.size - 1)
+
+    def _find(self, building_name, h):
+        """Slot holding building_name, or -1."""
+        mask = self.size - 1
+        i = h & mask
+        keys, hashes = self.keys, self.hashes
+        while keys[i] is not None:
+            if hashes[i] == h and keys[i] == building_name:
+                return i
+            i = (i + 1) & mask
+        return -1
+
+    def add(self, building_name, coordinates, extra_info):
+        """Add a building record to the hash table."""
+        h = fnv1a(building_name)
+        if self._find(building_name, h) != -1:
+            return f"Building {building_name} already exists."
+        if self.used + 1 > self.size * self.max_load_factor:
+            self.resize(self.size * 2 if self.count + 1 > self.size * self.max_load_factor / 2 else self.size)
+        mask = self.size - 1
+        i = h & mask
+        while self.keys[i] is not None and self.keys[i] is not _DELETED:
+            i = (i + 1) & mask
+        if self.keys[i] is None:
+            self.used += 1
+        self.keys[i] = building_name
+        self.hashes[i] = h
+        self.records[i] = BuildingRecord(building_name, coordinates, extra_info)
+        self.count += 1
+
+    def resize(self, new_size):
+        """Rehash live records into new_size slots, dropping tombstones."""
+        old = [(k, h, r) for k, h, r in zip(self.keys, self.hashes, self.records)
+               if k is not None and k is not _DELETED]
+        self._allocate(new_size)
+        mask = new_size - 1
+        for key, h, record in old:
+            i = h & mask
+            while self.keys[i] is not None:
+                i = (i + 1) & mask
+            self.keys[i] = key
+            self.hashes[i] = h
+            self.records[i] = record
+        self.count = self.used = len(old)
+
+    def get(self, building_name):
+        """Retrieve a building record by name."""
+        i = self._find(building_name, fnv1a(building_name))
+        return self.records[i] if i != -1 else None
+
+    def delete(self, building_name):
+        """Delete a building record by name."""
+        i = self._find(building_name, fnv1a(building_name))
+        if i == -1:
+            return f"Building {building_name} not found."
+        self.keys[i] = _DELETED
+        self.records[i] = None
+        self.count -= 1
+        return f"Building {building_name} deleted."
+
+    def chain_lengths(self):
+        """Probe length of each live record (1 = found in its home slot)."""
+        mask = self.size - 1
+        return [((i - (h & mask)) & mask) + 1
+                for i, (k, h) in enumerate(zip(self.keys, self.hashes))
+                if k is not None and k is not _DELETED]
 
 
 # Load data from campus_map.geojson
 def load_building_data(file_path):
-    """Loads building data from a geojson file."""
-    with open(file_path, 'r') as file:
-        geojson_data = json.load(file)
+    """Loads building data from a geojson file, one feature at a time."""
+    return building_data_from_features(iter_features(file_path))
+
+def building_data_from_geojson(geojson_data):
+    """Extracts building data from already parsed geojson."""
+    return building_data_from_features(geojson_data['features'])
+
+def building_data_from_features(features):
+    """Extracts building data from an iterable of geojson features."""
     building_data = []
-    for feature in geojson_data['features']:
+    for feature in features:
         if feature['geometry']['type'] == 'Point':
             name = feature['properties'].get('Name')
             coordinates = feature['geometry']['coordinates']
@@ -86,57 +256,62 @@ def load_building_data(file_path):
     return building_data
 
 # Embedded data for each building category
+DEAN_BUILDINGS = {
+    "CHSS - Admin Building": {"Dean": "Prof. Jhoanna Lynn B. Cruz ", "Tel. No.": "(082) 293 0084"},
+    "School of Management Building": {"Dean": "Assoc. Prof. Aurelia Luzviminda V. Gomez", "Tel. No.": "(082) 295-2188"},
+    "CSM Building": { "Dean": "Prof. Cleto L. Nanola Jr.", "Tel. No.": "(082) 293 0312"}
+}
+
+RESEARCH_CENTERS = {
+    "CARIM Building": {"Research Focus Areas": "Innovation", "Personnel": "N/A"}
+}
+
+LIBRARIES = {
+    "Library": {"Personnel": "Merlyn M. Pausanos, RL", "Opening Hours": "8 AM - 86 PM"}
+}
+
+SPORTS_FACILITIES = {
+    "Sports Complex Stadium": {"Athletic training equipment" : "", "Opening Hours": "6 AM - 6 PM"},
+    "Training Gym": {"Fitness Equipment": "Treadmills, Weights", "Opening Hours": "6 AM - 6 PM"},
+    "Cultural Complex Center": {"Performance spaces" : "Stage", "Seating Configuration" : "None"}
+}
+
+UNAVAILABLE_FACILITIES = {
+    "Aquatics Center": {"Status": "Unavailable"}
+}
+
+STUDENT_BUILDINGS = {
+    "EBL Dorm": {"Personnel": "Ann Miraflor Batomalaque", "Contact": "https://www.facebook.com/annmiraflor.batomalaque", },
+    "Kalimudan / Student Center Lane": {"Facilities": "Canteen, lounges", "Opening Hours": "7 AM - 6 PM"}
+}
+
+# Intersections: explicitly excluded from insertion
+EXCLUDED_INTERSECTIONS = frozenset([
+    "TODA Intersection", "Rotunda 1", "Rotunda 2", "Rotunda 3",
+    "CARIM Intersection", "Sports Complex Intersection"
+])
+
+DEFAULT_DETAILS = {"Details": "Other or Unknown Building"}
+
+# All categories merged into one lookup; a name listed in several categories
+# keeps the entry from the first one, in the order below
+BUILDING_DETAILS = {}
+for _category in (DEAN_BUILDINGS, RESEARCH_CENTERS, LIBRARIES, SPORTS_FACILITIES,
+                  UNAVAILABLE_FACILITIES, STUDENT_BUILDINGS):
+    for _name, _info in _category.items():
+        if _info and _name not in BUILDING_DETAILS:
+            BUILDING_DETAILS[_name] = _info
+
 def get_embedded_data(building_name):
-    """Get embedded data for a specific building name."""
-    dean_buildings = {
-        "CHSS - Admin Building": {"Dean": "Prof. Jhoanna Lynn B. Cruz ", "Tel. No.": "(082) 293 0084"},
-        "School of Management Building": {"Dean": "Assoc. Prof. Aurelia Luzviminda V. Gomez", "Tel. No.": "(082) 295-2188"},
-        "CSM Building": { "Dean": "Prof. Cleto L. Nanola Jr.", "Tel. No.": "(082) 293 0312"}
-    }
-
-    research_centers = {
-        "CARIM Building": {"Research Focus Areas": "Innovation", "Personnel": "N/A"}
-    }
-
-    libraries = {
-        "Library": {"Personnel": "Merlyn M. Pausanos, RL", "Opening Hours": "8 AM - 86 PM"}
-    }
-
-    sports_facilities = {
-        "Sports Complex Stadium": {"Athletic training equipment" : "", "Opening Hours": "6 AM - 6 PM"},
-        "Training Gym": {"Fitness Equipment": "Treadmills, Weights", "Opening Hours": "6 AM - 6 PM"},
-        "Cultural Complex Center": {"Performance spaces" : "Stage", "Seating Configuration" : "None"}
-    }
-
-    unavailable_facilities = {
-        "Aquatics Center": {"Status": "Unavailable"}
-    }
-
-    student_buildings = {
-        "EBL Dorm": {"Personnel": "Ann Miraflor Batomalaque", "Contact": "https://www.facebook.com/annmiraflor.batomalaque", },
-        "Kalimudan / Student Center Lane": {"Facilities": "Canteen, lounges", "Opening Hours": "7 AM - 6 PM"}
-    }
-
-    # Intersections: explicitly excluded from insertion
-    excluded_intersections = [
-        "TODA Intersection", "Rotunda 1", "Rotunda 2", "Rotunda 3",
-        "CARIM Intersection", "Sports Complex Intersection"
-    ]
+    """Get embedded data for a specific building name.
 
+    The returned dict is shared with every other building in the same
+    category, so treat it as read-only.
+    """
     # Skip intersections
-    if building_name in excluded_intersections:
+    if building_name in EXCLUDED_INTERSECTIONS:
         return None
-
-    # Determine the category and return data
-    return (
-        dean_buildings.get(building_name)
-        or research_centers.get(building_name)
-        or libraries.get(building_name)
-        or sports_facilities.get(building_name)
-        or unavailable_facilities.get(building_name)
-        or student_buildings.get(building_name)
-        or {"Details": "Other or Unknown Building"}
-    )
+    return BUILDING_DETAILS.get(building_name, DEFAULT_DETAILS)
 
 # Main program
 if __name__ == "__main__":
@@ -0,0 +1,114 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""Everything reachable from one node within a walking distance.
+
+The search is distances_within(), which never touches nodes beyond the
+budget. Each edge leaving a reached node is walked as far as the budget
+allows from either end: fully reached edges are returned whole, the rest
+are cut at the point where the budget runs out, along the edge's real
+geometry. The outline is the convex hull of the reached nodes and cut points.
+"""
+from typing import Dict, List, Sequence, Tuple
+
+from algorithms import CompiledGraph, distances_within, haversine_distance, INFINITY
+
+Coord = Tuple[float, float]
+
+
+def clip_line(coords: Sequence[Coord], fraction: float) -> List[Coord]:
+    """The first fraction (0-1) of a polyline, measured along its length."""
+    if fraction >= 1:
+        return [tuple(c) for c in coords]
+    lengths = [haversine_distance(coords[i], coords[i + 1]) for i in range(len(coords) - 1)]
+    target = sum(lengths) * max(0.0, fraction)
+    clipped = [tuple(coords[0])]
+    for i, length in enumerate(lengths):
+        if length >= target:
+            t = target / length if length > 0 else 0.0
+            (lon1, lat1), (lon2, lat2) = coords[i], coords[i + 1]
+            clipped.append((lon1 + (lon2 - lon1) * t, lat1 + (lat2 - lat1) * t))
+            return clipped
+        target -= length
+        clipped.append(tuple(coords[i + 1]))
+    return clipped
+
+
+def convex_hull(points) -> List[Coord]:
+    """Closed ring (first point repeated at the end), counterclockwise; monotone chain."""
+    points = sorted(set(points))
+    if len(points) < 3:
+        return points
+
+    def cross(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower, upper = [], []
+    for p in points:
+        while len(lower) >= 2 and cross(lower[-2], lower[-1], p) <= 0:
+            lower.pop()
+        lower.append(p)
+    for p in reversed(points):
+        while len(upper) >= 2 and cross(upper[-2], upper[-1], p) <= 0:
+            upper.pop()
+        upper.append(p)
+    ring = lower[:-1] + upper[:-1]
+    return ring + ring[:1]
+
+
+def isochrone(graph: CompiledGraph, coords: Dict[str, Coord], edge_geometries, source: str,
+              budget: float, stats=None) -> dict:
+    """Reached nodes with their distances, reached path segments and their hull.
+
+    segments are {'node1', 'node2', 'geometry', 'full'}; a partial segment's
+    geometry starts at node1 and stops where the budget runs out.
+    """
+    reached = distances_within(graph, source, budget, stats)
+    ids, names = graph.ids, graph.names
+    offsets, neighbors, weights = graph.offsets, graph.neighbors, graph.weights
+
+    def geometry(u_name, v_name):
+        return edge_geometries.get((u_name, v_name)) or [coords[u_name], coords[v_name]]
+
+    n = len(names)
+    segments = []
+    hull_points = [tuple(coords[name]) for name in reached]
+    seen = set()  # u * n + v with u < v, so parallel edges give one segment
+    for u_name, du in reached.items():
+        u = ids[u_name]
+        for k in range(offsets[u], offsets[u + 1]):
+            v, w = neighbors[k], weights[k]
+            if w == INFINITY:
+                continue
+            v_name = names[v]
+            dv = reached.get(v_name)
+            if dv is not None and u > v:
+                continue  # reached from both ends; handled from the smaller id
+            pair = u * n + v if u < v else v * n + u
+            if pair in seen:
+                continue
+            seen.add(pair)
+            from_u = min(w, budget - du)
+            from_v = 0.0 if dv is None else min(w, budget - dv)
+            if from_u + from_v >= w:
+                segments.append({'node1': u_name, 'node2': v_name, 'geometry': geometry(u_name, v_name), 'full': True})
+                continue
+            # two partial pieces that do not meet, one from each reached end
+            for start, end, length in ((u_name, v_name, from_u), (v_name, u_name, from_v)):
+                if start not in reached or length <= 0:
+                    continue
+                piece = clip_line(geometry(start, end), length / w)
+                segments.append({'node1': start, 'node2': end, 'geometry': piece, 'full': False})
+                hull_points.append(piece[-1])
+
+    return {
+        'reached': reached,
+        'segments': segments,
+        'hull': convex_hull(hull_points),
+    }
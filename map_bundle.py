@@ -0,0 +1,169 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""One immutable version of the map and everything derived from it.
+
+app.py keeps the current MapBundle in a single module-level reference.
+A reload builds a complete new bundle off to the side and then replaces
+that reference in one assignment, which is atomic in Python. A request
+handler reads the reference once and uses only that bundle, so it sees
+one consistent map even if a swap happens while it runs, and it never
+waits on a lock.
+
+Edge edits (closures, reopenings, reweights) work the same way:
+with_overlay() returns a new bundle whose graph shares everything with the
+old one except a copied weights array. A closed edge gets an infinite
+weight, so searches need no extra checks. Derived data (route table rows,
+MST responses, cached routes) is carried over only where the edited edges
+cannot change it.
+"""
+import copy
+import itertools
+import threading
+from array import array
+
+from algorithms import RouteTable, INFINITY, mst_unaffected, astar_admissible
+from hashtable import HashTable
+from metrics import phase
+from search import BuildingSearchIndex
+from spatial import KDTree
+
+# Revisions of edited bundles come from one counter for the whole process, so a
+# version string is never reused, not even by a reloaded map whose saved edits
+# are applied again. A request finishing on an old bundle can then never cache
+# its route under a key a newer bundle serves.
+_revisions = itertools.count(1)
+
+
+class MapBundle:
+    def __init__(self, map_data, hash_table_class=HashTable, route_table_trees: int = 128):
+        self.map_data = map_data
+        self.version = map_data.version                  # cache key for everything derived from this map
+        self.graph = map_data.graph
+        self.building_coords = map_data.building_coords
+        self.building_names = map_data.building_names
+        self.buildings = list(map_data.building_names)
+        self.edge_geometries = map_data.edge_geometries
+
+        with phase('hash_table_fill'):
+            self.hash_table = hash_table_class(50)
+            for building_name, coordinates, extra_info in map_data.building_records:
+                self.hash_table.add(building_name, coordinates, extra_info)
+
+        # Typeahead index over the same names the hash table can look up
+        with phase('search_index'):
+            self.search_index = BuildingSearchIndex(name for name, _, _ in map_data.building_records)
+
+        # Nearest-point lookups for coordinate endpoints. Only nodes with edges are
+        # indexed, so a location never snaps to a building that has no pathway
+        with phase('spatial_index'):
+            offsets, lons, lats = self.graph.offsets, self.graph.lons, self.graph.lats
+            connected = [i for i in range(len(self.graph)) if offsets[i + 1] > offsets[i]]
+            self.node_index = KDTree(connected, [lons[i] for i in connected], [lats[i] for i in connected])
+            self.building_index = KDTree(self.buildings, [self.building_coords[n][0] for n in self.buildings],
+                                         [self.building_coords[n][1] for n in self.buildings])
+
+        self.route_table = RouteTable(self.graph, self.buildings, route_table_trees)
+        self.mst_cache = {}  # algorithm -> (serialized body, etag, unpruned tree edges)
+
+        # edge edits on top of the GeoJSON weights, keyed by sorted node name pair:
+        # ('closed', None), ('weight', meters) or ('factor', multiplier)
+        self.base_weights = self.graph.weights
+        self.overlay = {}
+        self.revision = 0
+        # what the last edit changed, for deciding which cached routes survive it
+        self.changed_pairs = frozenset()
+        self.decreased = False
+        self.survivors = frozenset()  # buildings whose distances to every building are unchanged
+        # False once an edit makes an edge shorter than the straight line between its ends;
+        # astar's heuristic is no longer a lower bound then, so app.py answers it with dijkstra
+        self.astar_exact = True
+
+    def start_precompute(self) -> None:
+        """Fill the route table in a background thread."""
+        threading.Thread(target=self._precompute, daemon=True).start()
+
+    def _precompute(self) -> None:
+        with phase('route_table_build'):
+            self.route_table.build()
+
+    def get_route_table(self):
+        """The precomputed route table, once it is finished."""
+        return self.route_table if self.route_table.ready else None
+
+    def retire(self) -> None:
+        """Called after the bundle has been swapped out; stops unfinished precomputation."""
+        self.route_table.cancel()
+
+    def snap(self, lon: float, lat: float, max_distance: float):
+        """(node name, meters) of the pathway node nearest to (lon, lat), or None if none is in range."""
+        found = self.node_index.nearest(lon, lat, 1, max_distance)
+        if not found:
+            return None
+        meters, node = found[0]
+        return self.graph.names[node], meters
+
+    def with_overlay(self, overlay):
+        """New bundle with the edge edits in overlay applied to the GeoJSON weights.
+
+        Returns (bundle, changes) where changes lists (u id, v id, old weight,
+        new weight) for every node pair whose shortest edge weight changed.
+        """
+        graph, base = self.graph, self.base_weights
+        weights = array('d', bytes(memoryview(base).cast('B')))
+        for (a, b), (kind, value) in overlay.items():
+            if a not in graph.ids or b not in graph.ids:
+                continue
+            for k in graph.pair_slots(graph.ids[a], graph.ids[b]):
+                weights[k] = INFINITY if kind == 'closed' else value if kind == 'weight' else base[k] * value
+
+        changes = []
+        changed_pairs = set()
+        for a, b in set(self.overlay) | set(overlay):
+            if a not in graph.ids or b not in graph.ids:
+                continue
+            u, v = graph.ids[a], graph.ids[b]
+            slots = graph.pair_slots(u, v)
+            if not slots:
+                continue
+            old = min(graph.weights[k] for k in slots)
+            new = min(weights[k] for k in slots)
+            if old != new:
+                changes.append((u, v, old, new))
+                changed_pairs.add((a, b))
+
+        new_bundle = copy.copy(self)
+        new_bundle.graph = graph.with_weights(weights)
+        edited_nodes = {graph.ids[n] for pair in overlay for n in pair if n in graph.ids}
+        new_bundle.astar_exact = astar_admissible(new_bundle.graph, edited_nodes)
+        new_bundle.overlay = dict(overlay)
+        new_bundle.revision = next(_revisions)
+        new_bundle.version = f"{self.map_data.version}+r{new_bundle.revision}"
+        new_bundle.route_table = self.route_table.derive(new_bundle.graph, changes)
+        new_bundle.mst_cache = {algorithm: entry for algorithm, entry in self.mst_cache.items()
+                                if mst_unaffected(entry[2], changes)}
+        new_bundle.changed_pairs = frozenset(changed_pairs)
+        new_bundle.decreased = any(new < old for _, _, old, new in changes)
+        new_bundle.survivors = frozenset(new_bundle.route_table.buildings[i] for i in new_bundle.route_table.kept)
+        return new_bundle, changes
+
+    def route_unaffected(self, mode, source, destination, pairs) -> bool:
+        """Whether a route cached on the previous bundle is still a shortest route on this one.
+
+        The route must avoid every edited edge. If an edit made an edge
+        shorter, the route must also join a surviving building to another
+        building, which means its length is still the shortest distance.
+        """
+        if pairs & self.changed_pairs:
+            return False
+        if not self.decreased:
+            return True
+        buildings = self.route_table.index
+        return ((source in self.survivors and destination in buildings)
+                or (destination in self.survivors and source in buildings))
@@ -0,0 +1,109 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""Synthetic campus maps in the shape of data/campus_map.geojson.
+
+Pathways form a street grid of about n_vertices vertices. Buildings are
+Point features named "Building k" placed exactly on grid vertices, so the
+graph builder snaps them the same way it snaps the real buildings. The
+other options make the map look more like real exports:
+
+    density         chance per grid cell of a diagonal shortcut path
+    segment_length  split each street into LineStrings of this many segments
+    multiline       fraction of streets written as one MultiLineString
+    jitter          random vertex offset, as a fraction of the grid spacing
+
+Write a map with e.g.
+    python mapgen.py big_map.geojson --vertices 100000 --buildings 2000 --density 0.1
+"""
+import argparse
+import json
+import random
+
+BASE_LON = 125.485
+BASE_LAT = 7.084
+SPACING = 0.00001  # roughly one meter between grid vertices
+
+
+def generate_map(n_vertices: int, n_buildings: int, density: float = 0.0, segment_length: int = 0,
+                 multiline: float = 0.0, jitter: float = 0.0, seed: int = 0) -> dict:
+    """FeatureCollection with a street grid of about n_vertices vertices and n_buildings buildings."""
+    rng = random.Random(seed)
+    side = max(2, int(n_vertices ** 0.5))
+    offsets = None
+    if jitter:
+        # one offset per vertex, so streets that cross still share the exact coordinate
+        jitter_rng = random.Random(seed + 1)
+        offsets = [(jitter_rng.uniform(-jitter, jitter) * SPACING, jitter_rng.uniform(-jitter, jitter) * SPACING)
+                   for _ in range(side * side)]
+
+    def coord(i, j):
+        if offsets is None:
+            return [BASE_LON + i * SPACING, BASE_LAT + j * SPACING]
+        dlon, dlat = offsets[i * side + j]
+        return [BASE_LON + i * SPACING + dlon, BASE_LAT + j * SPACING + dlat]
+
+    features = []
+    cells = rng.sample(range(side * side), min(n_buildings, side * side))
+    for k, cell in enumerate(cells):
+        features.append({
+            "type": "Feature",
+            "properties": {"Name": f"Building {k}"},
+            "geometry": {"type": "Point", "coordinates": coord(cell // side, cell % side)},
+        })
+
+    def street(vertices):
+        if segment_length > 0:
+            pieces = [vertices[start:start + segment_length + 1]
+                      for start in range(0, len(vertices) - 1, segment_length)]
+        else:
+            pieces = [vertices]
+        if multiline and rng.random() < multiline:
+            geometries = [{"type": "MultiLineString", "coordinates": pieces}]
+        else:
+            geometries = [{"type": "LineString", "coordinates": piece} for piece in pieces]
+        for geometry in geometries:
+            features.append({"type": "Feature", "properties": {"Name": "Campus Pathways"}, "geometry": geometry})
+
+    for i in range(side):
+        street([coord(i, j) for j in range(side)])
+        street([coord(j, i) for j in range(side)])
+
+    if density:
+        for i in range(side - 1):
+            for j in range(side - 1):
+                if rng.random() < density:
+                    # alternate the two diagonals so shortcuts do not all run the same way
+                    ends = [coord(i, j), coord(i + 1, j + 1)] if (i + j) % 2 else [coord(i + 1, j), coord(i, j + 1)]
+                    features.append({"type": "Feature", "properties": {"Name": "Campus Pathways"},
+                                     "geometry": {"type": "LineString", "coordinates": ends}})
+    return {"type": "FeatureCollection", "features": features}
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Write a synthetic campus map as GeoJSON")
+    parser.add_argument("output")
+    parser.add_argument("--vertices", type=int, default=10000)
+    parser.add_argument("--buildings", type=int, default=200)
+    parser.add_argument("--density", type=float, default=0.0)
+    parser.add_argument("--segment-length", type=int, default=0)
+    parser.add_argument("--multiline", type=float, default=0.0)
+    parser.add_argument("--jitter", type=float, default=0.0)
+    parser.add_argument("--seed", type=int, default=0)
+    args = parser.parse_args()
+
+    data = generate_map(args.vertices, args.buildings, args.density, args.segment_length,
+                        args.multiline, args.jitter, args.seed)
+    with open(args.output, "w", encoding="utf-8") as f:
+        json.dump(data, f)
+    print(f"Wrote {args.output} ({len(data['features'])} features)")
+
+
+if __name__ == "__main__":
+    main()
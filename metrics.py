@@ -0,0 +1,175 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""Timers, counters and a sampling profiler for the Flask app.
+
+phase("search") times a block. The duration goes into a latency histogram
+labeled with the phase, and into the running request's breakdown, which
+app.py returns as a Server-Timing header. Everything recorded is served
+by /metrics in the Prometheus text format.
+
+SamplingProfiler records one thread's stack every few milliseconds through
+sys._current_frames() and returns the samples as folded stacks
+("outer;inner;leaf count" lines), which flamegraph tools read directly.
+"""
+import sys
+import threading
+import time
+from bisect import bisect_left
+from collections import Counter
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Tuple
+
+# upper bounds in seconds; requests on the campus map take about 1-50 ms
+LATENCY_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _label_text(labels: Tuple[Tuple[str, str], ...]) -> str:
+    if not labels:
+        return ''
+    escaped = (value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in labels)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(labels, escaped)) + '}'
+
+
+class Histogram:
+    """Bucket counts, sum and count of observed values for one label set."""
+    __slots__ = ('bounds', 'counts', 'total', 'count')
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)  # last slot is +Inf
+        self.total = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self.bounds, value)] += 1
+        self.total += value
+        self.count += 1
+
+
+class Metrics:
+    """Registry of counters, gauges and histograms, keyed by name and label values."""
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.help: Dict[str, str] = {}  # name -> help text
+        self.counters: Dict[Tuple[str, tuple], float] = {}
+        self.gauges: Dict[Tuple[str, tuple], float] = {}
+        self.histograms: Dict[Tuple[str, tuple], Histogram] = {}
+
+    def describe(self, name: str, text: str) -> None:
+        self.help[name] = text
+
+    def inc(self, name: str, amount: float = 1, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            self.counters[key] = self.counters.get(key, 0) + amount
+
+    def set(self, name: str, value: float, **labels) -> None:
+        with self.lock:
+            self.gauges[(name, tuple(sorted(labels.items())))] = value
+
+    def observe(self, name: str, value: float, **labels) -> None:
+        key = (name, tuple(sorted(labels.items())))
+        with self.lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram(LATENCY_BUCKETS)
+            histogram.observe(value)
+
+    def render(self) -> str:
+        """All series in the Prometheus text exposition format."""
+        by_name: Dict[str, List[str]] = {}
+        kinds: Dict[str, str] = {}
+        with self.lock:
+            for kind, series in (('counter', self.counters), ('gauge', self.gauges)):
+                for (name, labels), value in sorted(series.items()):
+                    kinds[name] = kind
+                    by_name.setdefault(name, []).append(f"{name}{_label_text(labels)} {value:g}")
+            for (name, labels), histogram in sorted(self.histograms.items()):
+                kinds[name] = 'histogram'
+                lines = by_name.setdefault(name, [])
+                cumulative = 0
+                for bound, count in zip(histogram.bounds + (float('inf'),), histogram.counts):
+                    cumulative += count
+                    le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                    lines.append(f"{name}_bucket{_label_text(labels + (('le', le),))} {cumulative}")
+                lines.append(f"{name}_sum{_label_text(labels)} {histogram.total:.6f}")
+                lines.append(f"{name}_count{_label_text(labels)} {histogram.count}")
+
+        out = []
+        for name in sorted(by_name):
+            if name in self.help:
+                out.append(f"# HELP {name} {self.help[name]}")
+            out.append(f"# TYPE {name} {kinds[name]}")
+            out.extend(by_name[name])
+        return '\n'.join(out) + '\n'
+
+
+metrics = Metrics()
+metrics.describe('campus_phase_duration_seconds', 'Time spent in one startup or request phase.')
+
+# phase name -> seconds for the request running on this thread, or None outside a request
+_local = threading.local()
+
+
+def begin_request() -> None:
+    _local.phases = {}
+
+
+def end_request() -> Dict[str, float]:
+    """The phase breakdown of the request that just finished."""
+    phases = getattr(_local, 'phases', None) or {}
+    _local.phases = None
+    return phases
+
+
+@contextmanager
+def phase(name: str):
+    """Time the with-block as phase name."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - start
+        metrics.observe('campus_phase_duration_seconds', elapsed, phase=name)
+        phases = getattr(_local, 'phases', None)
+        if phases is not None:
+            phases[name] = phases.get(name, 0.0) + elapsed
+
+
+class SamplingProfiler:
+    """Samples the stack of one thread from a background thread until stop()."""
+    def __init__(self, thread_id: Optional[int] = None, interval: float = 0.002):
+        self.thread_id = thread_id if thread_id is not None else threading.get_ident()
+        self.interval = interval
+        self.samples = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self) -> 'SamplingProfiler':
+        self._thread.start()
+        return self
+
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            stack = []
+            while frame is not None:
+                code = frame.f_code
+                stack.append(f"{code.co_name} ({code.co_filename.rsplit('/', 1)[-1]}:{code.co_firstlineno})")
+                frame = frame.f_back
+            self.samples[';'.join(reversed(stack))] += 1
+
+    def stop(self) -> str:
+        """Stop sampling and return the folded stacks, most frequent first."""
+        self._stop.set()
+        self._thread.join()
+        return ''.join(f"{stack} {count}\n" for stack, count in self.samples.most_common())
@@ -0,0 +1,122 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""Bounded LRU cache for serialized route responses.
+
+Routes are undirected, so one entry holds the serialized response for both
+directions of a building pair. Counters are kept so the capacity can be
+sized from real traffic. Each entry can remember the edges its route uses,
+so that an edge edit only drops the routes it can affect (see migrate).
+"""
+import threading
+from collections import OrderedDict
+
+
+class RouteCache:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.entries = OrderedDict()  # key -> {(source, destination): bytes}
+        self.paths = {}  # key -> frozenset of (node, node) pairs, sorted, along the route
+        self.lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes = 0
+
+    @staticmethod
+    def pair_key(version, mode, source, destination):
+        """Same key for (a, b) and (b, a)."""
+        a, b = (source, destination) if source <= destination else (destination, source)
+        return (version, mode, a, b)
+
+    def get(self, version, mode, source, destination):
+        """Serialized response for this direction, or None."""
+        key = self.pair_key(version, mode, source, destination)
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self.entries.move_to_end(key)
+            self.hits += 1
+            return entry[(source, destination)]
+
+    def put(self, version, mode, source, destination, forward: bytes, backward: bytes, path=None) -> None:
+        """Store both directions; backward is the response for destination -> source.
+
+        path is the route's node list; entries stored without it are dropped by migrate().
+        """
+        if self.capacity <= 0:
+            return
+        key = self.pair_key(version, mode, source, destination)
+        entry = {(source, destination): forward, (destination, source): backward}
+        size = len(forward) + len(backward) if source != destination else len(forward)
+        with self.lock:
+            old = self.entries.pop(key, None)
+            if old is not None:
+                self.bytes -= self._size(old)
+            self.entries[key] = entry
+            self.bytes += size
+            if path is not None:
+                self.paths[key] = frozenset((a, b) if a <= b else (b, a) for a, b in zip(path, path[1:]))
+            else:
+                self.paths.pop(key, None)
+            while len(self.entries) > self.capacity:
+                evicted_key, evicted = self.entries.popitem(last=False)
+                self.paths.pop(evicted_key, None)
+                self.bytes -= self._size(evicted)
+                self.evictions += 1
+
+    @staticmethod
+    def _size(entry) -> int:
+        return sum(len(body) for body in entry.values())
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.paths.clear()
+            self.bytes = 0
+
+    def migrate(self, old_version, new_version, keep):
+        """Move old_version entries to new_version where keep(mode, a, b, pairs) allows.
+
+        Entries of old_version that are not kept, or have no stored path, are
+        dropped. Entries of other versions are left alone, and the LRU order
+        is preserved. Returns (kept, dropped).
+        """
+        kept = dropped = 0
+        with self.lock:
+            entries = OrderedDict()
+            for key, entry in self.entries.items():
+                version, mode, a, b = key
+                if version == old_version:
+                    pairs = self.paths.pop(key, None)
+                    if pairs is None or not keep(mode, a, b, pairs):
+                        self.bytes -= self._size(entry)
+                        dropped += 1
+                        continue
+                    key = (new_version, mode, a, b)
+                    self.paths[key] = pairs
+                    kept += 1
+                entries[key] = entry
+            self.entries = entries
+        return kept, dropped
+
+    def stats(self) -> dict:
+        with self.lock:
+            lookups = self.hits + self.misses
+            return {
+                'capacity': self.capacity,
+                'entries': len(self.entries),
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': round(self.hits / lookups, 4) if lookups else 0.0,
+                'evictions': self.evictions,
+                'bytes': self.bytes,
+            }
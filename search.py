@@ -0,0 +1,163 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""Typeahead search over building names.
+
+Results come in three tiers:
+    prefix  the whole name starts with the query
+    word    a later word of the name starts with the query ("annex" -> "CSM Annex")
+    fuzzy   trigram similarity, for typos ("libary" -> "Library")
+
+Both prefix tiers are sorted arrays searched with bisect, so they come out
+already in alphabetical order and only the requested page is read. The
+fuzzy tier counts shared trigrams through an inverted index of posting
+arrays; with numpy the counting is one bincount over the query's postings.
+"""
+import math
+import re
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Dict, Iterable, List, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional, only makes fuzzy matching faster
+    np = None
+
+FUZZY_THRESHOLD = 0.3   # minimum Jaccard similarity of trigram sets
+MIN_FUZZY_QUERY = 3     # shorter queries only get prefix matches
+
+_NON_WORD = re.compile(r'[^0-9a-z]+')
+
+
+def normalize(text: str) -> str:
+    """Lowercase, with punctuation and repeated spaces collapsed to one space."""
+    return _NON_WORD.sub(' ', text.lower()).strip()
+
+
+def trigrams(normalized: str) -> set:
+    padded = f"  {normalized} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class BuildingSearchIndex:
+    def __init__(self, names: Iterable[str]):
+        self.names: List[str] = sorted(set(names), key=lambda n: (normalize(n), n))
+        normalized = [normalize(n) for n in self.names]
+
+        # names are sorted by normalized form, so these keys are sorted too
+        self.full_keys = normalized
+
+        # one entry per later word: the name from that word onwards
+        word_entries = []
+        for i, key in enumerate(normalized):
+            for match in re.finditer(' ', key):
+                word_entries.append((key[match.end():], i))
+        word_entries.sort()
+        self.word_keys = [key for key, _ in word_entries]
+        self.word_ids = array('i', [i for _, i in word_entries])
+
+        postings: Dict[str, List[int]] = {}
+        self.gram_counts = array('i')  # trigram set size per name
+        for i, key in enumerate(normalized):
+            grams = trigrams(key)
+            self.gram_counts.append(len(grams))
+            for gram in grams:
+                postings.setdefault(gram, []).append(i)
+        self.postings = {gram: array('i', ids) for gram, ids in postings.items()}
+        if np is not None:
+            self.postings = {gram: np.frombuffer(ids, dtype=np.int32) for gram, ids in self.postings.items()}
+            self.gram_counts = np.frombuffer(self.gram_counts, dtype=np.int32)
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+    def _prefix_ids(self, keys, q):
+        start = bisect_left(keys, q)
+        for i in range(start, len(keys)):
+            if not keys[i].startswith(q):
+                return
+            yield i
+
+    def _fuzzy(self, q: str, k: int) -> List[Tuple[float, int]]:
+        """Best k (similarity, id) pairs at or above FUZZY_THRESHOLD, best first.
+
+        A name at the threshold shares at least ceil(t * a) of the query's a
+        trigrams, so only names past that count are scored.
+        """
+        query_grams = trigrams(q)
+        a = len(query_grams)
+        min_shared = max(1, math.ceil(FUZZY_THRESHOLD * a - 1e-9))
+        lists = [self.postings[g] for g in query_grams if g in self.postings]
+        if len(lists) < min_shared:
+            return []
+        if np is not None:
+            shared = np.bincount(np.concatenate(lists), minlength=len(self.names))
+            ids = np.flatnonzero(shared >= min_shared)
+            shared = shared[ids]
+            scores = shared / (a + self.gram_counts[ids] - shared)
+            keep = scores >= FUZZY_THRESHOLD
+            ids, scores = ids[keep], scores[keep]
+            if len(ids) > k:
+                # keep everything tied with the k-th best so the id tiebreak stays exact
+                kth = -np.partition(-scores, k - 1)[k - 1]
+                keep = scores >= kth
+                ids, scores = ids[keep], scores[keep]
+            order = np.lexsort((ids, -scores))[:k]
+            return [(float(scores[j]), int(ids[j])) for j in order]
+
+        counts = Counter()
+        for ids in lists:
+            counts.update(ids)
+        scored = []
+        for i, shared in counts.items():
+            if shared < min_shared:
+                continue
+            score = shared / (a + self.gram_counts[i] - shared)
+            if score >= FUZZY_THRESHOLD:
+                scored.append((-score, i))
+        scored.sort()
+        return [(-score, i) for score, i in scored[:k]]
+
+    def search(self, query: str, limit: int = 10, offset: int = 0) -> dict:
+        """One page of ranked matches plus whether more follow it."""
+        q = normalize(query)
+        wanted = offset + limit + 1  # one extra tells us if there is a next page
+        results = []
+        seen = set()
+        if q:
+            for i in self._prefix_ids(self.full_keys, q):
+                if len(results) >= wanted:
+                    break
+                seen.add(i)
+                results.append((self.names[i], 'prefix', 1.0))
+            for j in self._prefix_ids(self.word_keys, q):
+                if len(results) >= wanted:
+                    break
+                i = self.word_ids[j]
+                if i not in seen:
+                    seen.add(i)
+                    results.append((self.names[i], 'word', 1.0))
+            if len(results) < wanted and len(q) >= MIN_FUZZY_QUERY:
+                for score, i in self._fuzzy(q, wanted + len(seen)):
+                    if len(results) >= wanted:
+                        break
+                    if i not in seen:
+                        seen.add(i)
+                        results.append((self.names[i], 'fuzzy', round(score, 3)))
+
+        page = results[offset:offset + limit]
+        return {
+            'query': query,
+            'results': [{'name': name, 'match': match, 'score': score} for name, match, score in page],
+            'offset': offset,
+            'limit': limit,
+            'has_more': len(results) > offset + limit,
+        }
@@ -0,0 +1,323 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""Map data loading with a binary snapshot cache.
+
+Building the graph from GeoJSON on every process start is wasted work when
+the map has not changed. build_map_data() does the full build once and
+write_snapshot() stores the result keyed by a hash of the GeoJSON bytes.
+Later starts memory-map the snapshot, so the graph arrays, the edge
+geometries and the feature edges are read straight from the page cache and
+shared between worker processes. Writing a snapshot deletes the ones left by
+earlier versions of the same map.
+
+Snapshot layout (native byte order, every section 8-byte aligned):
+    8 bytes   MAGIC
+    8 bytes   header length (little-endian uint64)
+    header    JSON: node names, building coordinates and names, hash table
+              records and the offset/typecode/length of each array
+    arrays    graph: offsets (q), neighbors (i), weights (d), lons (d), lats (d)
+              edge geometries: geometry_ends (i, node id pairs), geometry_offsets (q),
+              geometry_coords (d, flat lon, lat)
+              feature edges: feature_indexes (q), feature_offsets (q),
+              feature_pairs (i, node id pairs)
+
+The JSON header is still parsed by every worker. It holds the strings the
+app needs as Python objects anyway (node names, about 15 bytes a node) and
+the per-building data; coordinates of path nodes come from lons/lats. The
+geometry and feature edge lookups are rebuilt per worker as a dict of views
+and an index over the mapped arrays, not copies of the coordinates.
+
+Prebuild with `python snapshot.py data/campus_map.geojson`.
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import re
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping
+from pathlib import Path
+
+from algorithms import build_graph_from_features, CompiledGraph, EdgeGeometries
+from geojson_stream import file_hash, iter_features
+from hashtable import building_data_from_features, get_embedded_data
+from metrics import phase
+
+MAGIC = b'CMSNAP01'
+# bump whenever the builder output changes so old snapshots are not reused
+FORMAT_VERSION = 6
+ARRAY_FIELDS = ('offsets', 'neighbors', 'weights', 'lons', 'lats')
+DEFAULT_CACHE_DIR = Path(__file__).parent / 'data' / 'cache'
+
+
+class MapData:
+    """Everything app.py derives from one GeoJSON file."""
+    def __init__(self, graph, building_coords, building_names, edge_geometries,
+                 building_records, version, feature_count, from_snapshot=False, feature_edges=None):
+        self.graph = graph                        # CompiledGraph with coordinates
+        self.building_coords = building_coords    # node name -> (lon, lat)
+        self.building_names = building_names      # set of building node names
+        self.edge_geometries = edge_geometries    # EdgeGeometries: (node1, node2) -> list of [lon, lat]
+        self.building_records = building_records  # (name, coordinates, details) for the hash table
+        self.version = version                    # content hash of the GeoJSON
+        self.feature_count = feature_count
+        self.from_snapshot = from_snapshot
+        self.feature_edges = feature_edges or {}  # feature index -> [(node1, node2)] it draws
+
+
+def content_hash(raw: bytes) -> str:
+    """Same value as geojson_stream.file_hash() of a file holding raw."""
+    return hashlib.sha256(raw).hexdigest()
+
+
+def build_map_data(geojson_data: dict, version: str) -> MapData:
+    """Full build: graph, coordinates, edge geometries and hash table records."""
+    return build_map_data_from_features(geojson_data.get('features', []), version)
+
+
+def build_map_data_from_features(features, version: str) -> MapData:
+    """build_map_data over an iterable of features, read exactly once.
+
+    The graph builder consumes the features; Point features are kept on the
+    side for the hash table, so a streamed file never has to be re-read.
+    """
+    point_features = []
+    feature_count = 0
+
+    def tap():
+        nonlocal feature_count
+        for feature in features:
+            feature_count += 1
+            if feature['geometry']['type'] == 'Point':
+                point_features.append(feature)
+            yield feature
+
+    edge_geometries = EdgeGeometries()
+    feature_edges = {}
+    # reading the features, snapping and geometry mapping happen in the one pass
+    with phase('graph_build'):
+        adjacency, building_coords, building_names = build_graph_from_features(tap(), edge_geometries, feature_edges)
+    with phase('graph_compile'):
+        graph = CompiledGraph.from_adjacency(adjacency, building_coords)
+
+    building_records = []
+    with phase('building_records'):
+        for building in building_data_from_features(point_features):
+            extra_info = get_embedded_data(building['Name'])
+            if extra_info:  # Only add buildings that are not excluded
+                building_records.append((building['Name'], tuple(building['Coordinates']), extra_info))
+
+    return MapData(graph, building_coords, building_names, edge_geometries, building_records,
+                   version, feature_count, feature_edges=feature_edges)
+
+
+def snapshot_path(geojson_path, version: str, cache_dir=None) -> Path:
+    cache_dir = Path(cache_dir) if cache_dir is not None else DEFAULT_CACHE_DIR
+    return cache_dir / f"{Path(geojson_path).stem}.{version[:16]}.v{FORMAT_VERSION}.snap"
+
+
+def _align(n: int) -> int:
+    return (n + 7) & ~7
+
+
+def _geometry_arrays(edge_geometries: EdgeGeometries, ids) -> dict:
+    """One line per node id pair; line k is geometry_coords[offsets[k]:offsets[k + 1]]."""
+    ends, offsets, coords = array('i'), array('q', [0]), array('d')
+    for (start, end), line in edge_geometries.lines.items():
+        ends.extend((ids[start], ids[end]))
+        coords.extend(line)
+        offsets.append(len(coords))
+    return {'geometry_ends': ends, 'geometry_offsets': offsets, 'geometry_coords': coords}
+
+
+def _feature_edge_arrays(feature_edges, ids) -> dict:
+    """Feature indexes in order; feature k draws pairs offsets[k] to offsets[k + 1]."""
+    indexes, offsets, pairs = array('q'), array('q', [0]), array('i')
+    for index, edges in sorted(feature_edges.items()):
+        indexes.append(index)
+        for u, v in edges:
+            pairs.extend((ids[u], ids[v]))
+        offsets.append(len(pairs) // 2)
+    return {'feature_indexes': indexes, 'feature_offsets': offsets, 'feature_pairs': pairs}
+
+
+class PackedFeatureEdges(Mapping):
+    """feature index -> [(node1, node2)] read from a snapshot's feature edge arrays."""
+    def __init__(self, names, indexes, offsets, pairs):
+        self.names = names
+        self.indexes = indexes
+        self.offsets = offsets
+        self.pairs = pairs
+
+    def __getitem__(self, index):
+        k = bisect_left(self.indexes, index)
+        if k == len(self.indexes) or self.indexes[k] != index:
+            raise KeyError(index)
+        names, pairs = self.names, self.pairs
+        return [(names[pairs[2 * j]], names[pairs[2 * j + 1]])
+                for j in range(self.offsets[k], self.offsets[k + 1])]
+
+    def __iter__(self):
+        return iter(self.indexes)
+
+    def __len__(self) -> int:
+        return len(self.indexes)
+
+
+def write_snapshot(map_data: MapData, path) -> None:
+    """Write atomically, so concurrent workers never read a half-written file."""
+    graph = map_data.graph
+    arrays = {field: getattr(graph, field) for field in ARRAY_FIELDS}
+    arrays.update(_geometry_arrays(map_data.edge_geometries, graph.ids))
+    arrays.update(_feature_edge_arrays(map_data.feature_edges, graph.ids))
+    layout = {}
+    offset = 0
+    for field, values in arrays.items():
+        layout[field] = [offset, values.typecode, len(values)]
+        offset = _align(offset + values.itemsize * len(values))
+
+    header = {
+        'format': FORMAT_VERSION,
+        'version': map_data.version,
+        'byteorder': sys.byteorder,
+        'feature_count': map_data.feature_count,
+        'names': graph.names,
+        # path nodes get theirs back from the lons/lats arrays
+        'building_coords': {name: list(c) for name, c in map_data.building_coords.items()
+                            if name in map_data.building_names or name not in graph.ids},
+        'building_names': sorted(map_data.building_names),
+        # details come from the tables in hashtable.py, so only names and coordinates are stored
+        'building_records': [[name, list(coordinates)] for name, coordinates, _ in map_data.building_records],
+        'arrays': layout,
+    }
+    header_bytes = json.dumps(header).encode('utf-8')
+    data_start = _align(16 + len(header_bytes))
+
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<Q', len(header_bytes)))
+        f.write(header_bytes)
+        for field, values in arrays.items():
+            f.seek(data_start + layout[field][0])
+            values.tofile(f)
+        f.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+    remove_stale_snapshots(path)
+
+
+def remove_stale_snapshots(path) -> None:
+    """Delete the snapshots of other map versions or formats next to path.
+
+    A worker still mapping one keeps its pages; the file just leaves the directory.
+    """
+    path = Path(path)
+    stem = path.name.rsplit('.', 3)[0]
+    pattern = re.compile(re.escape(stem) + r'\.[0-9a-f]{16}\.v\d+\.snap')
+    for other in path.parent.iterdir():
+        if other.name != path.name and pattern.fullmatch(other.name):
+            try:
+                other.unlink()
+            except OSError:
+                pass  # another worker removed it first
+
+
+def read_snapshot(path, version: str = None) -> MapData:
+    """Memory-map a snapshot; raises ValueError if it is unusable or for another version."""
+    with open(path, 'rb') as f:
+        mm = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    if mm[:8] != MAGIC:
+        raise ValueError("not a map snapshot")
+    (header_len,) = struct.unpack('<Q', mm[8:16])
+    header = json.loads(mm[16:16 + header_len].decode('utf-8'))
+    if header['format'] != FORMAT_VERSION or header['byteorder'] != sys.byteorder:
+        raise ValueError("snapshot format mismatch")
+    if version is not None and header['version'] != version:
+        raise ValueError("snapshot is for a different map")
+
+    data_start = _align(16 + header_len)
+    view = memoryview(mm)
+    arrays = {}
+    for field, (offset, typecode, length) in header['arrays'].items():
+        start = data_start + offset
+        nbytes = struct.calcsize(typecode) * length
+        arrays[field] = view[start:start + nbytes].cast(typecode)
+
+    graph = CompiledGraph(header['names'], arrays['offsets'], arrays['neighbors'],
+                          arrays['weights'], arrays['lons'], arrays['lats'])
+    names = graph.names
+    building_coords = {name: tuple(c) for name, c in header['building_coords'].items()}
+    for i, name in enumerate(names):
+        if name not in building_coords:
+            building_coords[name] = (graph.lons[i], graph.lats[i])
+    edge_geometries = EdgeGeometries()
+    ends, offsets, coords = arrays['geometry_ends'], arrays['geometry_offsets'], arrays['geometry_coords']
+    for k in range(len(offsets) - 1):
+        edge_geometries.add(names[ends[2 * k]], names[ends[2 * k + 1]], coords[offsets[k]:offsets[k + 1]])
+    building_records = []
+    for name, coordinates in header['building_records']:
+        extra_info = get_embedded_data(name)
+        if extra_info:
+            building_records.append((name, tuple(coordinates), extra_info))
+    feature_edges = PackedFeatureEdges(names, arrays['feature_indexes'], arrays['feature_offsets'],
+                                       arrays['feature_pairs'])
+    return MapData(graph, building_coords, set(header['building_names']), edge_geometries,
+                   building_records, header['version'], header['feature_count'], from_snapshot=True,
+                   feature_edges=feature_edges)
+
+
+def load_map_data(geojson_path, cache_dir=None, use_snapshot: bool = True) -> MapData:
+    """Load from a matching snapshot if there is one, otherwise build and write it.
+
+    The GeoJSON is streamed both for hashing and for the build, so it is never
+    held in memory as a whole.
+    """
+    with phase('geojson_hash'):
+        version = file_hash(geojson_path)
+    path = snapshot_path(geojson_path, version, cache_dir)
+    if use_snapshot and path.exists():
+        try:
+            with phase('snapshot_read'):
+                return read_snapshot(path, version)
+        except (ValueError, KeyError, OSError) as e:
+            print(f"WARNING: ignoring snapshot {path}: {e}")
+
+    map_data = build_map_data_from_features(iter_features(geojson_path), version)
+    if use_snapshot:
+        try:
+            with phase('snapshot_write'):
+                write_snapshot(map_data, path)
+        except OSError as e:
+            print(f"WARNING: could not write snapshot {path}: {e}")
+    return map_data
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Prebuild the map snapshot used by app.py")
+    parser.add_argument('geojson', nargs='?',
+                        default=str(Path(__file__).parent / 'data' / 'campus_map.geojson'))
+    parser.add_argument('--cache-dir', default=None)
+    args = parser.parse_args()
+
+    version = file_hash(args.geojson)
+    map_data = build_map_data_from_features(iter_features(args.geojson), version)
+    path = snapshot_path(args.geojson, version, args.cache_dir)
+    write_snapshot(map_data, path)
+    print(f"Wrote {path} ({len(map_data.graph)} nodes, {len(map_data.building_names)} buildings)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,183 @@
+# CMSC 122 Final Project
+# Jhaye Marie H. Gonzales
+# Nas John D. Lumapas
+# Jay Emerson P. Navares
+# Eve Loraine M. Nuñal
+# Krystel Mikylla M. Perez
+# Rey Marvin C. Rizal
+# Rex Uriel I. Villaflores
+
+"""Spatial indexes for coordinate lookups.
+
+SpatialGrid buckets (lon, lat) points into uniform square cells so that
+"is there a point within TOLERANCE of this coordinate" only has to look at
+the 3x3 block of cells around the query instead of every point.
+
+KDTree answers nearest-point and within-radius queries in meters, for
+snapping an arbitrary location (e.g. a phone's GPS fix) onto the map.
+"""
+import math
+from array import array
+from bisect import insort
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+try:
+    import numpy as np
+except ImportError:  # optional, only makes KDTree construction faster
+    np = None
+
+EARTH_RADIUS = 6371000  # meters, same as algorithms.EARTH_RADIUS
+
+
+class SpatialGrid:
+    def __init__(self, cell_size: float):
+        if cell_size <= 0:
+            raise ValueError("cell_size must be positive")
+        self.cell_size = cell_size
+        # cell key -> list of (insertion order, item, lon, lat)
+        self.cells: Dict[Tuple[int, int], List[Tuple[int, Hashable, float, float]]] = {}
+        self.count = 0
+
+    def _cell(self, lon: float, lat: float) -> Tuple[int, int]:
+        return (int(lon // self.cell_size), int(lat // self.cell_size))
+
+    def insert(self, item: Hashable, lon: float, lat: float) -> None:
+        key = self._cell(lon, lat)
+        if key not in self.cells:
+            self.cells[key] = []
+        self.cells[key].append((self.count, item, lon, lat))
+        self.count += 1
+
+    def find(self, lon: float, lat: float, tolerance: float) -> Optional[Hashable]:
+        """Return the earliest inserted item within tolerance of (lon, lat), or None.
+
+        Matches use the same per-axis test as a linear scan
+        (abs(dlon) < tolerance and abs(dlat) < tolerance), so swapping a scan
+        for the grid does not change which item is returned.
+        """
+        if tolerance > self.cell_size:
+            raise ValueError("tolerance must not exceed cell_size")
+        cx, cy = self._cell(lon, lat)
+        best = None
+        for dx in (-1, 0, 1):
+            for dy in (-1, 0, 1):
+                bucket = self.cells.get((cx + dx, cy + dy))
+                if not bucket:
+                    continue
+                for order, item, p_lon, p_lat in bucket:
+                    if abs(lon - p_lon) < tolerance and abs(lat - p_lat) < tolerance:
+                        if best is None or order < best[0]:
+                            best = (order, item)
+        return best[1] if best is not None else None
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class KDTree:
+    """Static 2-d tree over (lon, lat) points.
+
+    Points are projected once onto a plane in meters (equirectangular around
+    the mean latitude, accurate to well under a meter across a campus) and
+    kept in three flat arrays in tree order: each range [lo, hi) splits at
+    its middle element, alternating x and y by depth, with ranges of at most
+    LEAF_SIZE points scanned directly. Query results are (meters, item)
+    sorted by distance, ties going to the earlier item.
+    """
+    LEAF_SIZE = 16
+
+    def __init__(self, items: Sequence[Hashable], lons: Sequence[float], lats: Sequence[float]):
+        n = len(items)
+        self.items = list(items)
+        self.lat0 = sum(lats) / n if n else 0.0
+        self.x_scale = math.radians(1) * EARTH_RADIUS * math.cos(math.radians(self.lat0))
+        self.y_scale = math.radians(1) * EARTH_RADIUS
+        ranges = []
+        stack = [(0, n, 0)]
+        while stack:
+            lo, hi, axis = stack.pop()
+            if hi - lo > self.LEAF_SIZE:
+                mid = (lo + hi) // 2
+                ranges.append((lo, hi, mid, axis))
+                stack.append((lo, mid, 1 - axis))
+                stack.append((mid + 1, hi, 1 - axis))
+
+        if np is not None:
+            xs = np.asarray(lons, dtype=np.float64) * self.x_scale
+            ys = np.asarray(lats, dtype=np.float64) * self.y_scale
+            order = np.arange(n)
+            # ranges are listed parents first, so each partition sees its parent's result;
+            # only the middle element has to land in place, with smaller keys before it
+            for lo, hi, mid, axis in ranges:
+                sub = order[lo:hi]
+                order[lo:hi] = sub[np.argpartition((xs if axis == 0 else ys)[sub], mid - lo)]
+            self.order = array('i', order.astype(np.int32).tobytes())
+            self.xs = array('d', xs[order].tobytes())
+            self.ys = array('d', ys[order].tobytes())
+        else:
+            x_all = [lon * self.x_scale for lon in lons]
+            y_all = [lat * self.y_scale for lat in lats]
+            order = list(range(n))
+            for lo, hi, mid, axis in ranges:
+                keys = x_all if axis == 0 else y_all
+                order[lo:hi] = sorted(order[lo:hi], key=keys.__getitem__)
+            self.order = array('i', order)
+            self.xs = array('d', (x_all[i] for i in order))
+            self.ys = array('d', (y_all[i] for i in order))
+
+    def __len__(self) -> int:
+        return len(self.items)
+
+    def _search(self, lon: float, lat: float, k: int, radius: float) -> List[Tuple[float, int, int]]:
+        """Up to k (squared meters, item index, tree position) within radius, nearest first."""
+        qx, qy = lon * self.x_scale, lat * self.y_scale
+        xs, ys, order = self.xs, self.ys, self.order
+        leaf = self.LEAF_SIZE
+        found = []
+        worst = radius * radius  # prune bound: the k-th best so far, or the radius
+        stack = [(0, len(xs), 0, 0.0)]
+        while stack:
+            lo, hi, axis, bound = stack.pop()
+            if bound > worst:
+                continue
+            if hi - lo <= leaf:
+                candidates = range(lo, hi)
+            else:
+                mid = (lo + hi) // 2
+                diff = (qx - xs[mid]) if axis == 0 else (qy - ys[mid])
+                far_bound = max(bound, diff * diff)
+                # the far side first, so the near side is popped and searched next
+                if diff < 0:
+                    stack.append((mid + 1, hi, 1 - axis, far_bound))
+                    stack.append((lo, mid, 1 - axis, bound))
+                else:
+                    stack.append((lo, mid, 1 - axis, far_bound))
+                    stack.append((mid + 1, hi, 1 - axis, bound))
+                candidates = (mid,)
+            for p in candidates:
+                dx = xs[p] - qx
+                dy = ys[p] - qy
+                d2 = dx * dx + dy * dy
+                if d2 <= worst:
+                    entry = (d2, order[p], p)
+                    if len(found) < k:
+                        insort(found, entry)
+                    elif entry < found[-1]:
+                        insort(found, entry)
+                        found.pop()
+                    else:
+                        continue
+                    if len(found) == k:
+                        worst = found[-1][0]
+        return found
+
+    def nearest(self, lon: float, lat: float, k: int = 1,
+                max_distance: float = math.inf) -> List[Tuple[float, Hashable]]:
+        """The k points closest to (lon, lat), optionally only those within max_distance meters."""
+        if k < 1:
+            return []
+        return [(math.sqrt(d2), self.items[i]) for d2, i, _ in self._search(lon, lat, k, max_distance)]
+
+    def within(self, lon: float, lat: float, radius: float) -> List[Tuple[float, Hashable]]:
+        """Every point within radius meters of (lon, lat)."""
+        return self.nearest(lon, lat, len(self.items), radius)